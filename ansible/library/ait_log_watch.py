@@ -0,0 +1,266 @@
+#!/usr/bin/python
+'''
+Created on Oct 18, 2026
+'''
+
+DOCUMENTATION = '''
+---
+module: ait_log_watch
+short_description: Wait for products to log that they are ready
+description:
+  - Follows several log files at once and returns as soon as a line of every log has matched its regex,
+    with the time to ready of each product.
+  - Uses inotify on the log directories when available, otherwise polls every poll_interval seconds.
+  - A file that exists when the watch starts is followed from its current end, like tail -n 0. Before that its
+    last lookback_bytes are searched for lines logged in the last lookback seconds, by the timestamp of the
+    line (or of the last line before it with one), so a product that logged before the watch opened the file
+    is found but lines of a previous run are not. Timestamps without a zone are local time.
+  - Files that do not exist yet are waited for, rotated (new inode) or truncated files are read from the start.
+options:
+  logs:
+    description: List of dicts with name, path and regex (e.g. elasticsearch_log_find.started).
+    required: true
+  timeout:
+    description: Seconds to wait for all logs.
+    default: 60
+  lookback:
+    description: Seconds, lines of existing files logged this long before the watch started can match, 0 to
+                 only follow new lines.
+    default: 60
+  lookback_bytes:
+    description: Bytes at the end of an existing file searched for recent lines.
+    default: 1048576
+  poll_interval:
+    description: Seconds between checks without inotify.
+    default: 0.5
+'''
+
+EXAMPLES = '''
+- ait_log_watch:
+    logs:
+      - { name: elasticsearch, path: '{{ elasticsearch_log_file }}', regex: '{{ elasticsearch_log_find.started }}' }
+      - { name: kibana, path: '{{ kibana_log_file }}', regex: '{{ kibana_log_find.started }}' }
+    timeout: '{{ elasticsearch_timeout }}'
+'''
+
+import os
+import re
+import time
+import errno
+import calendar
+import select
+import struct
+
+from ansible.module_utils.basic import AnsibleModule
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+# First timestamp of a log line, e.g. [2018-01-29T10:00:00,123] or "@timestamp":"2018-01-29T10:00:00Z"
+LINE_TIME = re.compile(r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:[.,]\d+)?(Z|[+-]\d{2}:?\d{2})?')
+
+
+def line_time(line):
+    '''
+    Epoch seconds of the first timestamp in line, None if it has none
+    '''
+    match = LINE_TIME.search(line)
+    if not match:
+        return None
+    fields = time.strptime(match.group(1) + ' ' + match.group(2), '%Y-%m-%d %H:%M:%S')
+    zone = match.group(3)
+    if not zone:
+        return time.mktime(fields)
+    seconds = calendar.timegm(fields)
+    if zone != 'Z':
+        offset = zone[1:].replace(':', '')
+        sign = -1 if zone[0] == '-' else 1
+        seconds -= sign * (int(offset[:2]) * 3600 + int(offset[2:]) * 60)
+    return seconds
+
+
+class Inotify(object):
+    '''
+    Minimal inotify through ctypes, wait() returns when something changed in a watched directory
+    '''
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        self.watched = set()
+
+    def watch(self, directory):
+        if directory in self.watched or not os.path.isdir(directory):
+            return
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if self.libc.inotify_add_watch(self.fd, directory.encode(), mask) >= 0:
+            self.watched.add(directory)
+
+    def wait(self, timeout):
+        readable = select.select([self.fd], [], [], timeout)[0]
+        if readable:
+            # Drain the events, the caller reads every log anyway
+            os.read(self.fd, 64 * (struct.calcsize('iIII') + 256))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower(object):
+    '''
+    Follows one log file across rotation and truncation and matches complete lines against regex
+    '''
+
+    def __init__(self, name, path, regex, start, lookback=0, lookback_bytes=1024 * 1024):
+        self.name = name
+        self.path = path
+        self.regex = re.compile(regex)
+        self.start = start
+        self.inode = None
+        self.offset = 0
+        self.partial = b''
+        self.ready_after = None
+        self.line = None
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        else:
+            # Follow lines written from now on, recent ones already there count too
+            self.inode = stat.st_ino
+            self.offset = stat.st_size
+            if lookback > 0 and stat.st_mtime >= start - lookback:
+                self.search_recent(start - lookback, lookback_bytes)
+
+    def search_recent(self, since, max_bytes):
+        '''
+        Match the lines before offset with a timestamp from since on, within the last max_bytes
+        '''
+        begin = max(self.offset - max_bytes, 0)
+        with open(self.path, 'rb') as f:
+            f.seek(begin)
+            lines = f.read(self.offset - begin).split(b'\n')
+        # The last line may still be written, following completes it
+        self.partial = lines.pop()
+        if begin and lines:
+            # Starts within a line
+            lines.pop(0)
+        logged = None
+        for line in lines:
+            line = line.decode('utf-8', 'replace')
+            logged = line_time(line) or logged
+            if logged is not None and logged >= since and self.match(line):
+                return True
+        return False
+
+    def match(self, line):
+        if self.regex.search(line):
+            self.ready_after = round(time.time() - self.start, 3)
+            self.line = line
+            return True
+        return False
+
+    def poll(self):
+        '''
+        Read what was appended since the last call, returns True once a line matched
+        '''
+        if self.ready_after is not None:
+            return True
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return False
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # New, rotated or truncated file
+            self.offset = 0
+            self.inode = stat.st_ino
+            self.partial = b''
+        if stat.st_size == self.offset:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            if self.match(line.decode('utf-8', 'replace')):
+                return True
+        return False
+
+
+def watch(followers, timeout, poll_interval):
+    start = time.time()
+    try:
+        inotify = Inotify()
+    except (OSError, AttributeError):
+        inotify = None
+    try:
+        while True:
+            pending = [follower for follower in followers if not follower.poll()]
+            remaining = start + timeout - time.time()
+            if not pending or remaining <= 0:
+                return pending
+            if inotify:
+                for follower in pending:
+                    inotify.watch(os.path.dirname(os.path.abspath(follower.path)))
+                # Still wake up regularly for directories that do not exist yet
+                inotify.wait(min(remaining, max(poll_interval, 1)))
+            else:
+                time.sleep(min(remaining, poll_interval))
+    finally:
+        if inotify:
+            inotify.close()
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            logs=dict(type='list', required=True),
+            timeout=dict(type='float', default=60),
+            lookback=dict(type='float', default=60),
+            lookback_bytes=dict(type='int', default=1024 * 1024),
+            poll_interval=dict(type='float', default=0.5),
+        ),
+        supports_check_mode=True
+    )
+    if module.check_mode:
+        module.exit_json(changed=False)
+    start = time.time()
+    followers = []
+    for log in module.params['logs']:
+        if not isinstance(log, dict) or not log.get('path') or not log.get('regex'):
+            module.fail_json(msg='Each log needs a path and regex: %s' % log)
+        try:
+            followers.append(LogFollower(log.get('name') or log['path'], log['path'], log['regex'], start,
+                                         module.params['lookback'], module.params['lookback_bytes']))
+        except re.error as e:
+            module.fail_json(msg='Invalid regex for %s: %s' % (log['path'], e))
+        except (IOError, OSError) as e:
+            module.fail_json(msg='Unable to read log: %s' % e)
+    try:
+        pending = watch(followers, module.params['timeout'], module.params['poll_interval'])
+    except (IOError, OSError) as e:
+        module.fail_json(msg='Unable to read log: %s' % e)
+    result = dict(changed=False,
+                  ready=dict((f.name, f.ready_after) for f in followers if f.ready_after is not None),
+                  lines=dict((f.name, f.line) for f in followers if f.line is not None),
+                  elapsed=round(time.time() - start, 3))
+    if pending:
+        result['pending'] = [follower.name for follower in pending]
+        module.fail_json(msg='Timed out after %ss waiting for: %s' %
+                         (module.params['timeout'], ', '.join(result['pending'])), **result)
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/python
+'''
+Created on Oct 18, 2026
+'''
+
+DOCUMENTATION = '''
+---
+module: ait_ready_probe
+short_description: Wait for stack products to answer over HTTP
+description:
+  - Probes every product concurrently, each one retried with exponential backoff until it is ready or the
+    timeout expires, and returns when all are ready with the time to ready of each product.
+  - elasticsearch is ready when _cluster/health reaches wait_for_status, kibana when /api/status is green,
+    logstash when its node stats api answers, apm_server when its root endpoint answers, a beat when its
+    stats endpoint answers (http.enabled) or, without a port, when a process runs its executable.
+  - A 401 means the product serves requests but the credentials are not set up yet (e.g. before the x-pack
+    passwords are set), it counts as ready.
+  - Without a scheme, https and http are tried, for products with and without x-pack ssl.
+options:
+  products:
+    description: List of dicts with name, type (elasticsearch, kibana, logstash, apm_server or beat) and
+                 optionally host, port, scheme, path, username, password and process (beat without port).
+    required: true
+  timeout:
+    description: Seconds to wait for all products.
+    default: 60
+  wait_for_status:
+    description: Elasticsearch cluster health status.
+    default: yellow
+  max_delay:
+    description: Maximum seconds between two probes of a product.
+    default: 5
+'''
+
+EXAMPLES = '''
+- ait_ready_probe:
+    products:
+      - { name: elasticsearch, type: elasticsearch, port: '{{ elasticsearch_port }}',
+          username: '{{ elasticsearch_username }}', password: '{{ elasticsearch_password }}' }
+      - { name: kibana, type: kibana, port: '{{ kibana_port }}' }
+      - { name: filebeat, type: beat, process: filebeat }
+    timeout: 120
+'''
+
+import os
+import json
+import time
+import socket
+import threading
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+PRODUCT_TYPES = {
+    'elasticsearch': {'port': 9200, 'path': '/_cluster/health?wait_for_status={status}&timeout=1s'},
+    'kibana': {'port': 5601, 'path': '/api/status'},
+    'logstash': {'port': 9600, 'path': '/_node/stats'},
+    'apm_server': {'port': 8200, 'path': '/'},
+    'beat': {'port': None, 'path': '/stats'},
+}
+
+HEALTH_STATUS = {'green': ['green'], 'yellow': ['green', 'yellow'], 'red': ['green', 'yellow', 'red']}
+
+
+def is_ready(product_type, status, body, wait_for_status):
+    if status == 401:
+        return True
+    if status != 200:
+        return False
+    if product_type not in ['elasticsearch', 'kibana']:
+        return True
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return False
+    if product_type == 'elasticsearch':
+        return data.get('status') in HEALTH_STATUS.get(wait_for_status, ['green'])
+    state = data.get('status', {}).get('overall', {}).get('state')
+    return state in [None, 'green']
+
+
+def process_exists(name):
+    '''
+    True if a process runs the executable name: the file name of its command, or the full path if name has one
+    '''
+    name = name.encode()
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            with open('/proc/%s/cmdline' % pid, 'rb') as f:
+                command = f.read().split(b'\0')[0]
+        except (IOError, OSError):
+            continue
+        if (command if b'/' in name else os.path.basename(command)) == name:
+            return True
+    return False
+
+
+class Probe(object):
+    '''
+    Readiness of one product, probe() makes one attempt
+    '''
+
+    def __init__(self, product, wait_for_status, start):
+        self.name = product.get('name') or product['type']
+        self.type = product['type']
+        defaults = PRODUCT_TYPES[self.type]
+        self.host = product.get('host') or 'localhost'
+        self.port = product.get('port') or defaults['port']
+        self.path = (product.get('path') or defaults['path']).format(status=wait_for_status)
+        self.schemes = [product['scheme']] if product.get('scheme') else ['https', 'http']
+        self.username = product.get('username')
+        self.password = product.get('password')
+        self.process = product.get('process') or self.name
+        self.wait_for_status = wait_for_status
+        self.start = start
+        self.ready_after = None
+        self.url = None
+        self.attempts = 0
+        self.error = None
+
+    def probe(self):
+        self.attempts += 1
+        if not self.port:
+            self.error = 'no %s process' % self.process
+            return process_exists(self.process)
+        for scheme in self.schemes:
+            url = '%s://%s:%s%s' % (scheme, self.host, self.port, self.path)
+            try:
+                response = open_url(url, url_username=self.username, url_password=self.password,
+                                    force_basic_auth=bool(self.username), validate_certs=False, timeout=10)
+                status, body = response.getcode(), response.read()
+            except socket.timeout as e:
+                self.error = '%s: %s' % (url, e)
+                continue
+            except Exception as e:
+                # HTTPError is a response, anything else means nothing answers on this scheme
+                if not hasattr(e, 'code'):
+                    self.error = '%s: %s' % (url, e)
+                    continue
+                status, body = e.code, b''
+            self.error = '%s: status %s' % (url, status)
+            if is_ready(self.type, status, body.decode('utf-8', 'replace'), self.wait_for_status):
+                self.url = url
+                self.schemes = [scheme]
+                return True
+        return False
+
+    def run(self, deadline, max_delay):
+        delay = 0.25
+        while True:
+            if self.probe():
+                self.ready_after = round(time.time() - self.start, 3)
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+
+def wait_ready(probes, timeout, max_delay):
+    deadline = time.time() + timeout
+    threads = [threading.Thread(target=probe.run, args=(deadline, max_delay)) for probe in probes]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        # A probe in flight can overrun the deadline by its request timeout
+        thread.join(max(deadline - time.time(), 0) + 15)
+    return [probe for probe in probes if probe.ready_after is None]
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            products=dict(type='list', required=True),
+            timeout=dict(type='float', default=60),
+            wait_for_status=dict(type='str', default='yellow', choices=['green', 'yellow', 'red']),
+            max_delay=dict(type='float', default=5),
+        ),
+        supports_check_mode=True
+    )
+    if module.check_mode:
+        module.exit_json(changed=False)
+    start = time.time()
+    probes = []
+    for product in module.params['products']:
+        if not isinstance(product, dict) or product.get('type') not in PRODUCT_TYPES:
+            module.fail_json(msg='Each product needs a type of %s: %s' % (', '.join(sorted(PRODUCT_TYPES)), product))
+        probes.append(Probe(product, module.params['wait_for_status'], start))
+    pending = wait_ready(probes, module.params['timeout'], module.params['max_delay'])
+    result = dict(changed=False,
+                  ready=dict((p.name, p.ready_after) for p in probes if p.ready_after is not None),
+                  urls=dict((p.name, p.url) for p in probes if p.url),
+                  attempts=dict((p.name, p.attempts) for p in probes),
+                  elapsed=round(time.time() - start, 3))
+    if pending:
+        result['pending'] = dict((p.name, p.error) for p in pending)
+        module.fail_json(msg='Timed out after %ss waiting for: %s' %
+                         (module.params['timeout'], ', '.join(sorted(result['pending']))), **result)
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
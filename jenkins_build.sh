@@ -17,6 +17,7 @@ check_env_workspace
 activate_python_virtual_env
 python_install_packages
 generate_build_variables
+prefetch_build_artifacts
 run_vm
 run_ansible_playbook
 run_tests
@@ -4,31 +4,33 @@ Created on Sep 14, 2017
 @author: liza.dayoub@elastic.co
 '''
 
-import re
 import yaml
 import os
 
-from es_build import ElasticStackBuild
+from es_build import ElasticStackBuild, resolve_builds
 
 def get_ansible_output(esb):    
     ansible_vars = {}
-    regex = re.compile('[a-z_]+_package_url')
-    attrs = [x for x in ElasticStackBuild.__dict__.keys() if regex.search(x)]
     prefix = ''
     if esb.upgrade:
         prefix = 'upgrade_'
     if esb.extension:
         ansible_vars = {prefix + 'package_ext': esb.extension}
-    for attr in attrs:
-        value = getattr(esb, attr)
+    for attr, value in esb.resolve_all().items():
         if value:
             ansible_vars.update({prefix + attr: value})
     return ansible_vars
  
 esb = ElasticStackBuild()
-#TODO: future use: upgrade support 
-#esb = ElasticStackBuild(upgrade=True)
+builds = [esb]
+if ElasticStackBuild.upgrade_defined():
+    builds.append(ElasticStackBuild(upgrade=True, session=esb.session, cache=esb.cache))
+resolve_builds(builds)
+
+ansible_vars = {}
+for build in builds:
+    ansible_vars.update(get_ansible_output(build))
 
 rootdir  = os.getenv('WORKSPACE', '/tmp')
 with open(rootdir + '/vars.yml', 'w') as f:
-    yaml.dump(get_ansible_output(esb), f, default_flow_style=False)
+    yaml.dump(ansible_vars, f, default_flow_style=False)
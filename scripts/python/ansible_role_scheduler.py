@@ -0,0 +1,37 @@
+'''
+Created on Oct 18, 2026
+
+Run the roles of a playbook concurrently by their ait_after dependencies, see RoleScheduler
+'''
+
+import os
+import sys
+import argparse
+
+from role_scheduler import RoleScheduler
+
+
+def default_max_parallel():
+    # Package manager installs lock the package database, run them one at a time
+    if os.getenv('ES_BUILD_PKG_EXT', '').lower() in ['deb', 'rpm']:
+        return 1
+    return None
+
+
+parser = argparse.ArgumentParser(description='Run playbook roles concurrently by their ait_after dependencies')
+parser.add_argument('playbook')
+parser.add_argument('-i', '--inventory')
+parser.add_argument('-l', '--limit')
+parser.add_argument('-e', '--extra-vars', action='append', default=[])
+parser.add_argument('--max-parallel', type=int,
+                    default=os.getenv('AIT_ANSIBLE_MAX_PARALLEL', '') or default_max_parallel())
+parser.add_argument('--log-dir')
+args = parser.parse_args()
+
+try:
+    scheduler = RoleScheduler(args.playbook, inventory=args.inventory, limit=args.limit,
+                              extra_vars=args.extra_vars, max_parallel=args.max_parallel, log_dir=args.log_dir)
+except (OSError, ValueError) as e:
+    print('Invalid playbook: ' + str(e))
+    sys.exit(1)
+sys.exit(0 if scheduler.run() else 1)
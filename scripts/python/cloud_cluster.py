@@ -8,14 +8,26 @@ import pytest
 import json
 import os
 import uuid
+import time
+import glob
+import datetime
 import hvac
+import requests
 import ast
 import sys, getopt
+from concurrent.futures import ThreadPoolExecutor
 from cloud_sdk_py.client import Client
+from poll import wait_until
 
 
 class CloudCluster:
 
+    max_workers = 8
+
+    # Minimum age in hours of a cluster without a properties file before it is reaped, other jobs (other
+    # workspaces or executors) may still use younger ones. Not less than CloudClusterPool.lease_timeout.
+    reap_age = 4
+
     # ------------------------------------------------------------------------------------------------------------------
     # Constructor
     def __init__(self):
@@ -42,30 +54,109 @@ class CloudCluster:
 
         region = os.environ.get("ESTF_CLOUD_REGION", 'us-east-1')
         monitoring = ast.literal_eval(os.environ.get("ESTF_CLOUD_MONITORING", 'true').title())
+        memory = int(os.environ.get("ESTF_CLOUD_MEMORY", 1024))
+        timeout = int(os.environ.get("ESTF_CLOUD_TIMEOUT", 1800))
 
-        plan = json.loads(self.basic_plan(version))
-        plan['cluster_name'] = 'ESTF_' + str(uuid.uuid4())
+        self.monitoring = monitoring
+        self.timeout = timeout
+        self.version = version
+        self.memory = memory
+        self.region = region
 
+        plan = self.new_plan()
         client = Client(plan=plan, username=username, password=password, host=host, region=region)
 
         self.client = client
-        self.monitoring = monitoring
         self.plan = plan
-        self.version = version
-        self.region = region
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # New plan with a unique cluster name
+    def new_plan(self):
+        plan = json.loads(self.basic_plan(self.version, mem=self.memory))
+        plan['cluster_name'] = 'ESTF_' + str(uuid.uuid4())
+        return plan
 
     # ------------------------------------------------------------------------------------------------------------------
     # Create
     def create(self):
-        data = self.client.create_cluster(self.plan)
+        data = self.format_data(self.client.create_cluster(self.plan))
         self.cluster_id = data['cluster_id']
-        cluster = self.client.get_cluster_info(self.cluster_id)
-        assert cluster['plan_info']['healthy']
+        self.wait_for_cluster(data)
+        return data
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Create multiple clusters concurrently with this client, if any create or wait fails the clusters already
+    # created are shutdown and deleted before the error is raised
+    def create_many(self, count, max_workers=None):
+        if count < 1:
+            raise ValueError('Cluster count must be at least 1')
+        plans = [self.new_plan() for _ in range(count)]
+        workers = min(count, max_workers or self.max_workers)
+        created = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                error = None
+                for future in [executor.submit(self.client.create_cluster, plan) for plan in plans]:
+                    try:
+                        created.append(self.format_data(future.result()))
+                    except Exception as e:
+                        error = error or e
+                if error:
+                    raise error
+                print('Created clusters: ' + ', '.join([data['cluster_id'] for data in created]))
+                list(executor.map(self.wait_for_cluster, created))
+            except Exception:
+                if created:
+                    print('[WARNING] Removing clusters: ' + ', '.join([data['cluster_id'] for data in created]))
+                    list(executor.map(self.reap_cluster, [data['cluster_id'] for data in created]))
+                raise
+        return created
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Wait for plan, elasticsearch, kibana and monitoring, return seconds spent in each phase. Monitoring is set
+    # (retried until the request succeeds) unless set_monitoring is False, e.g. for an existing cluster
+    def wait_for_cluster(self, cluster_data, timeout=None, set_monitoring=True):
+        cluster_id = cluster_data['cluster_id']
+
+        def monitoring_ready():
+            nonlocal set_monitoring
+            if set_monitoring:
+                self.client.set_monitoring(cluster_id)
+                set_monitoring = False
+            return self.monitoring_attached(cluster_id)
+
+        deadline = time.monotonic() + (timeout or self.timeout)
+        phases = [('plan_accepted', lambda: 'plan_info' in self.client.get_cluster_info(cluster_id)),
+                  ('elasticsearch_healthy', lambda: self.elasticsearch_healthy(cluster_data)),
+                  ('kibana_healthy', lambda: self.url_is_up(cluster_data['kibana_url'] + '/api/status'))]
         if self.monitoring:
-            self.client.set_monitoring(self.cluster_id)
-            cluster = self.client.get_cluster_info(self.cluster_id)
-            assert self.cluster_id in cluster['elasticsearch_monitoring_info']['source_cluster_ids']
-        return self.format_data(data)
+            phases.append(('monitoring_attached', monitoring_ready))
+        durations = {}
+        for phase, condition in phases:
+            start = time.monotonic()
+            wait_until(condition, max(deadline - time.monotonic(), 0), waiting_for=phase + ' for cluster ' + cluster_id)
+            durations[phase] = time.monotonic() - start
+        durations['total'] = sum(durations.values())
+        print('Cluster ' + cluster_id + ' ready: ' +
+              ', '.join(['{0} {1:.1f}s'.format(phase, seconds) for phase, seconds in durations.items()]))
+        return durations
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Elasticsearch plan is healthy and the endpoint answers
+    def elasticsearch_healthy(self, cluster_data):
+        cluster = self.client.get_cluster_info(cluster_data['cluster_id'])
+        return cluster['plan_info']['healthy'] and self.url_is_up(cluster_data['elasticsearch_url'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Cluster is listed as a monitoring source
+    def monitoring_attached(self, cluster_id):
+        cluster = self.client.get_cluster_info(cluster_id)
+        return cluster_id in cluster['elasticsearch_monitoring_info']['source_cluster_ids']
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Endpoint answers, authentication required counts as up
+    def url_is_up(self, url):
+        return requests.get(url, timeout=10).status_code in (200, 401)
 
     # ------------------------------------------------------------------------------------------------------------------
     # Format return data
@@ -98,6 +189,74 @@ class CloudCluster:
             raise ValueError('Cluster ID must be set')
         self.client.delete_cluster(cluster_id)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Shutdown and delete ESTF_ clusters that have no properties file and are older than age hours (default
+    # reap_age), clusters of unknown age are never reaped
+    def reap(self, age=None, dry_run=False, keep=(), max_workers=None):
+        if age is None:
+            age = self.reap_age
+        if age <= 0:
+            raise ValueError('Reap age must be more than 0 hours')
+        clusters = self.client.get_clusters()
+        if isinstance(clusters, dict):
+            clusters = clusters.get('elasticsearch_clusters', [])
+        estf_clusters = [cluster for cluster in clusters if cluster.get('cluster_name', '').startswith('ESTF_')]
+        live = self.live_cluster_ids([cluster['cluster_id'] for cluster in estf_clusters])
+        orphans = []
+        for cluster in estf_clusters:
+            cluster_id = cluster['cluster_id']
+            if cluster_id in live or cluster_id in keep:
+                continue
+            cluster_age = self.cluster_age(cluster)
+            if cluster_age is None or cluster_age < age * 60 * 60:
+                continue
+            orphans.append(cluster_id)
+        print('Orphaned clusters: ' + (', '.join(orphans) or 'none'))
+        if dry_run or not orphans:
+            return orphans
+        workers = min(len(orphans), max_workers or self.max_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.reap_cluster, orphans))
+        return orphans
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Shutdown and delete one cluster, a cluster already stopped may fail to shutdown
+    def reap_cluster(self, cluster_id):
+        try:
+            self.shutdown(cluster_id)
+        except Exception as e:
+            print('[WARNING] Shutdown failed for cluster_id: ' + cluster_id + ': ' + str(e))
+        try:
+            self.delete(cluster_id)
+            print('Deleted cluster: ' + cluster_id)
+            return True
+        except Exception as e:
+            print('[WARNING] Delete failed for cluster_id: ' + cluster_id + ': ' + str(e))
+        return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Cluster age in seconds from the current plan start time, None if not known
+    def cluster_age(self, cluster):
+        try:
+            started = cluster['plan_info']['current']['attempt_start_time']
+            started = datetime.datetime.strptime(started[:19], '%Y-%m-%dT%H:%M:%S')
+        except (KeyError, TypeError, ValueError):
+            return None
+        return (datetime.datetime.utcnow() - started).total_seconds()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Cluster ids that still have a properties file, single or combined
+    def live_cluster_ids(self, cluster_ids):
+        live = set([cluster_id for cluster_id in cluster_ids if self.check_filename(cluster_id)])
+        directories = set([os.path.dirname(self.get_filename('ESTF')), os.getcwd()])
+        for directory in directories:
+            for filename in glob.glob(os.path.join(directory, 'ESTF_clusters_*.properties')):
+                with open(filename) as file:
+                    for line in file:
+                        if line.startswith('cluster_ids='):
+                            live.update(line.strip().split('=', 1)[1].split(','))
+        return live
+
     # ------------------------------------------------------------------------------------------------------------------
     # Create properties file
     def create_properties_file(self, cluster_data):
@@ -111,6 +270,35 @@ class CloudCluster:
         file.close()
         return filename
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Create one properties file for multiple clusters, keys are prefixed with the cluster id
+    def create_combined_properties_file(self, clusters_data):
+        cluster_ids = [cluster_data.get('cluster_id') for cluster_data in clusters_data]
+        if not all(cluster_ids):
+            raise ValueError('Data does not contain cluster_id')
+        filename = self.get_filename('ESTF_clusters_' + str(uuid.uuid4()))
+        file = open(filename, "w")
+        file.write("cluster_ids=" + ",".join(cluster_ids) + "\n")
+        for cluster_id, cluster_data in zip(cluster_ids, clusters_data):
+            for key in cluster_data.keys():
+                file.write(cluster_id + "." + key + "=" + cluster_data[key] + "\n")
+        file.close()
+        return filename
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Read properties file
+    def read_properties_file(self, cluster_id):
+        filename = self.check_filename(cluster_id)
+        if not filename:
+            raise ValueError('Could not find properties file for cluster_id: ' + cluster_id)
+        cluster_data = {}
+        with open(filename) as file:
+            for line in file:
+                if '=' in line:
+                    key, value = line.rstrip('\n').split('=', 1)
+                    cluster_data[key] = value
+        return cluster_data
+
     # ------------------------------------------------------------------------------------------------------------------
     # Delete properties file
     def delete_properties_file(self, cluster_id):
@@ -193,19 +381,46 @@ class CloudCluster:
 # ----------------------------------------------------------------------------------------------------------------------
 def main(argv):
 
-    help_msg = """cloud_cluster.py -c | -s <cluster_id> | -d <cluster_id>
+    help_msg = """cloud_cluster.py -c [-n <count> [-a]] | -r [--age <hours>] [--dry-run] | -w <cluster_id> |
+                        -s <cluster_id> | -d <cluster_id>
         -c: create a cluster 
+        -n <count>: with -c, create count clusters concurrently, one properties file per cluster
+        -a: with -n, write one combined properties file for all clusters
+        -r: shutdown and delete ESTF_ clusters without a properties file (leaked by crashed jobs)
+        --age <hours>: with -r, only clusters older than hours, default 4 (jobs in other workspaces may
+                       still use younger clusters)
+        --dry-run: with -r, only list the clusters
+        -w <cluster_id>: wait for a cluster from its properties file and show time spent per phase, monitoring
+                         is not set again
         -s <cluster_id>: shutdown a cluster using cluster id 
         -d <cluster_id>: delete a cluster using cluster id
     """
 
     try:
-        opts, args = getopt.getopt(argv, "hcs:d:", ["create", "shutdown=", "delete="])
+        opts, args = getopt.getopt(argv, "hcn:arw:s:d:", ["create", "count=", "combined", "reap", "age=", "dry-run",
+                                                            "wait=", "shutdown=", "delete="])
     except getopt.GetoptError:
         print(help_msg)
         sys.exit(2)
 
-    if ('-c' in argv and len(argv) != 1) or len(argv) > 2:
+    opt_names = [opt for opt, arg in opts]
+    create = '-c' in opt_names or '--create' in opt_names
+    count = [arg for opt, arg in opts if opt in ("-n", "--count")]
+    combined = '-a' in opt_names or '--combined' in opt_names
+    reap = '-r' in opt_names or '--reap' in opt_names
+    age = [arg for opt, arg in opts if opt == "--age"]
+    dry_run = '--dry-run' in opt_names
+
+    if create:
+        allowed = ("-c", "--create", "-n", "--count", "-a", "--combined")
+    elif reap:
+        allowed = ("-r", "--reap", "--age", "--dry-run")
+    else:
+        allowed = [opt for opt in opt_names if opt not in ("-n", "--count", "-a", "--combined", "--age", "--dry-run")]
+
+    if args or [opt for opt in opt_names if opt not in allowed] or (not create and not reap and len(argv) > 2) or \
+            (combined and not count) or (count and not count[0].isdigit()) or \
+            (age and (not age[0].replace('.', '', 1).isdigit() or float(age[0]) <= 0)):
         print(help_msg)
         sys.exit(2)
 
@@ -213,11 +428,31 @@ def main(argv):
         if opt == '-h':
             print(help_msg)
             sys.exit()
+        elif opt in ("-c", "--create") and count:
+            print('\n******Create Clusters: ' + count[0])
+            cluster = CloudCluster()
+            clusters = cluster.create_many(int(count[0]))
+            if combined:
+                filenames = [cluster.create_combined_properties_file(clusters)]
+            else:
+                filenames = [cluster.create_properties_file(data) for data in clusters]
+            for filename in filenames:
+                print("\ncloud_properties_file: " + filename)
         elif opt in ("-c", "--create"):
             print('\n******Create Cluster')
             cluster = CloudCluster()
             filename = cluster.create_properties_file(cluster.create())
             print("\ncloud_properties_file: " + filename)
+        elif opt in ("-r", "--reap"):
+            print('\n******Reap Clusters')
+            from cloud_pool import pooled_cluster_ids
+            cluster = CloudCluster()
+            cluster.reap(age=float(age[0]) if age else None, dry_run=dry_run, keep=pooled_cluster_ids())
+        elif opt in ("-w", "--wait"):
+            cluster_id = arg
+            print('\n******Wait for Cluster: ' + str(cluster_id))
+            cluster = CloudCluster()
+            cluster.wait_for_cluster(cluster.read_properties_file(cluster_id), set_monitoring=False)
         elif opt in ("-s", "--shutdown"):
             cluster_id = arg
             print('\n******Shutdown Cluster: ' + str(cluster_id))
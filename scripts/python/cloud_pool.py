@@ -0,0 +1,280 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import requests
+import sys, getopt
+from requests.packages.urllib3 import disable_warnings
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from cloud_cluster import CloudCluster
+
+
+def default_db_file():
+    return os.environ.get('ESTF_CLOUD_POOL_DB', os.path.expanduser('~/.estf_cloud_pool.db'))
+
+
+def pooled_cluster_ids(db_file=None):
+    """Ids of all clusters held by any pool, so they are not taken for leaked clusters"""
+    db_file = db_file or default_db_file()
+    if not os.path.isfile(db_file):
+        return set()
+    db = sqlite3.connect(db_file, timeout=60)
+    try:
+        return set(row[0] for row in db.execute('SELECT cluster_id FROM clusters'))
+    except sqlite3.OperationalError:
+        return set()
+    finally:
+        db.close()
+
+
+class CloudClusterPool:
+
+    """Pool of pre-provisioned cloud clusters shared by the jobs on a host
+
+    Clusters are grouped by plan version and memory (ESTF_CLOUD_VERSION, ESTF_CLOUD_MEMORY). A job leases a
+    ready cluster, and when it is returned its indices are deleted and it goes back to ready instead of
+    being destroyed. Pool state is kept in a sqlite file (ESTF_CLOUD_POOL_DB, default ~/.estf_cloud_pool.db)
+    so concurrent executors on the same host share it.
+
+    Leases older than lease_timeout are treated as leaked by a crashed job, their clusters are destroyed
+    on the next fill. Clusters being created by a fill are reserved as creating rows, so concurrent fills
+    do not overshoot the pool size.
+    """
+
+    lease_timeout = 4 * 60 * 60
+
+    # Properties file helpers do not need an authenticated client, share them with CloudCluster
+    get_filename = CloudCluster.get_filename
+    check_filename = CloudCluster.check_filename
+    create_properties_file = CloudCluster.create_properties_file
+    delete_properties_file = CloudCluster.delete_properties_file
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Constructor
+    def __init__(self, db_file=None):
+        self.db_file = db_file or default_db_file()
+        self.version = os.environ.get("ESTF_CLOUD_VERSION")
+        self.memory = int(os.environ.get("ESTF_CLOUD_MEMORY", 1024))
+        if not self.version:
+            raise ValueError('Cloud version must be set')
+        self.pool = self.version + '-' + str(self.memory)
+        self._cloud = None
+        self.db = sqlite3.connect(self.db_file, timeout=60, isolation_level=None)
+        self.db.execute('CREATE TABLE IF NOT EXISTS clusters ('
+                        'cluster_id TEXT PRIMARY KEY, pool TEXT, state TEXT, data TEXT, '
+                        'leased_by TEXT, leased_at REAL, created_at REAL)')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Cloud client, only authenticated when clusters are created or destroyed
+    @property
+    def cloud(self):
+        if not self._cloud:
+            self._cloud = CloudCluster()
+        return self._cloud
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Top up the pool to size ready clusters, leased and recycling clusters do not count, clusters another
+    # fill is creating do
+    def fill(self, size):
+        self.reap_expired_leases()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            count = self.db.execute('SELECT COUNT(*) FROM clusters WHERE pool = ? AND state IN (?, ?)',
+                                    (self.pool, 'ready', 'creating')).fetchone()[0]
+            reserved = ['creating-' + str(uuid.uuid4()) for _ in range(size - count)]
+            for cluster_id in reserved:
+                self.db.execute('INSERT INTO clusters VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                (cluster_id, self.pool, 'creating', None, None, time.time(), time.time()))
+            self.db.execute('COMMIT')
+        except:
+            self.db.execute('ROLLBACK')
+            raise
+        if not reserved:
+            return []
+        try:
+            clusters = self.cloud.create_many(len(reserved))
+            for cluster_data in clusters:
+                self._insert(cluster_data, 'ready')
+        finally:
+            self.db.executemany('DELETE FROM clusters WHERE cluster_id = ?', [(cluster_id,) for cluster_id in reserved])
+        return clusters
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Lease a healthy ready cluster, create one if the pool has none
+    def lease(self, owner=None):
+        owner = owner or '{0}:{1}'.format(socket.gethostname(), os.getpid())
+        while True:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.db.execute('SELECT cluster_id, data FROM clusters WHERE pool = ? AND state = ? '
+                                      'ORDER BY created_at LIMIT 1', (self.pool, 'ready')).fetchone()
+                if row:
+                    self.db.execute('UPDATE clusters SET state = ?, leased_by = ?, leased_at = ? '
+                                    'WHERE cluster_id = ?', ('leased', owner, time.time(), row[0]))
+                self.db.execute('COMMIT')
+            except:
+                self.db.execute('ROLLBACK')
+                raise
+            if not row:
+                break
+            cluster_data = json.loads(row[1])
+            if self.healthy(cluster_data):
+                return cluster_data
+            print('[WARNING] Pool cluster is not healthy, destroying it: ' + row[0])
+            try:
+                self.destroy(row[0])
+            except Exception as e:
+                print('[WARNING] Unable to destroy cluster: ' + row[0] + ': ' + str(e))
+        cluster_data = self.cloud.create_many(1)[0]
+        self._insert(cluster_data, 'leased', owner)
+        return cluster_data
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Return a leased cluster, wipe it and make it ready again, destroy it if wiping fails
+    def release(self, cluster_id):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.db.execute('SELECT data FROM clusters WHERE cluster_id = ? AND state = ?',
+                                  (cluster_id, 'leased')).fetchone()
+            if row:
+                self.db.execute('UPDATE clusters SET state = ? WHERE cluster_id = ?', ('recycling', cluster_id))
+            self.db.execute('COMMIT')
+        except:
+            self.db.execute('ROLLBACK')
+            raise
+        if not row:
+            raise ValueError('Cluster is not leased from pool: ' + cluster_id)
+        try:
+            self.wipe(json.loads(row[0]))
+        except requests.RequestException as e:
+            print('[WARNING] Unable to wipe cluster: ' + cluster_id + ', destroying it: ' + str(e))
+            self.destroy(cluster_id)
+            return
+        self.db.execute('UPDATE clusters SET state = ?, leased_by = NULL, leased_at = NULL WHERE cluster_id = ?',
+                        ('ready', cluster_id))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Cluster still exists, its plan is healthy and Elasticsearch and Kibana answer
+    def healthy(self, cluster_data):
+        try:
+            return bool(self.cloud.elasticsearch_healthy(cluster_data) and
+                        self.cloud.url_is_up(cluster_data['kibana_url'] + '/api/status'))
+        except Exception as e:
+            print('[WARNING] Unable to check cluster health: ' + cluster_data['cluster_id'] + ': ' + str(e))
+            return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Delete all non-system indices, with the credentials cloud returned when the cluster was created
+    def wipe(self, cluster_data):
+        if not cluster_data.get('es_username') or not cluster_data.get('es_password'):
+            raise ValueError('Cluster data does not contain es_username and es_password: ' +
+                             cluster_data['cluster_id'])
+        disable_warnings(InsecureRequestWarning)
+        url = cluster_data['elasticsearch_url'].rstrip('/')
+        auth = (cluster_data['es_username'], cluster_data['es_password'])
+        r = requests.get(url + '/_cat/indices?format=json&h=index', auth=auth, verify=False, timeout=60)
+        r.raise_for_status()
+        indices = [item['index'] for item in r.json() if not item['index'].startswith('.')]
+        for i in range(0, len(indices), 50):
+            r = requests.delete(url + '/' + ','.join(indices[i:i + 50]), auth=auth, verify=False, timeout=60)
+            r.raise_for_status()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Shutdown and delete a pool cluster
+    def destroy(self, cluster_id):
+        try:
+            self.cloud.shutdown(cluster_id)
+            self.cloud.delete(cluster_id)
+        finally:
+            self.db.execute('DELETE FROM clusters WHERE cluster_id = ?', (cluster_id,))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Destroy clusters whose lease has expired, drop reservations of fills that did not finish
+    def reap_expired_leases(self):
+        expired = self.db.execute('SELECT cluster_id, state FROM clusters WHERE pool = ? AND state != ? '
+                                  'AND leased_at < ?',
+                                  (self.pool, 'ready', time.time() - self.lease_timeout)).fetchall()
+        for cluster_id, state in expired:
+            if state == 'creating':
+                self.db.execute('DELETE FROM clusters WHERE cluster_id = ?', (cluster_id,))
+                continue
+            print('[WARNING] Lease expired, destroying cluster: ' + cluster_id)
+            self.destroy(cluster_id)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Destroy all ready clusters in the pool
+    def drain(self):
+        ready = self.db.execute('SELECT cluster_id FROM clusters WHERE pool = ? AND state = ?',
+                                (self.pool, 'ready')).fetchall()
+        for (cluster_id,) in ready:
+            self.destroy(cluster_id)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Pool status
+    def status(self):
+        return self.db.execute('SELECT cluster_id, state, leased_by FROM clusters WHERE pool = ? '
+                               'ORDER BY created_at', (self.pool,)).fetchall()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Insert cluster
+    def _insert(self, cluster_data, state, owner=None):
+        leased_at = time.time() if state == 'leased' else None
+        self.db.execute('INSERT INTO clusters VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (cluster_data['cluster_id'], self.pool, state, json.dumps(cluster_data),
+                         owner, leased_at, time.time()))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def main(argv):
+
+    help_msg = """cloud_pool.py -f <size> | -l | -r <cluster_id> | -x | -s
+        -f <size>: fill the pool up to size clusters
+        -l: lease a cluster and write its properties file
+        -r <cluster_id>: return a leased cluster to the pool
+        -x: destroy all ready clusters in the pool
+        -s: show pool status
+    """
+
+    try:
+        opts, args = getopt.getopt(argv, "hf:lr:xs", ["fill=", "lease", "release=", "drain", "status"])
+    except getopt.GetoptError:
+        print(help_msg)
+        sys.exit(2)
+
+    if len(opts) != 1 or args:
+        print(help_msg)
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            print(help_msg)
+            sys.exit()
+        pool = CloudClusterPool()
+        if opt in ("-f", "--fill"):
+            print('\n******Fill Pool: ' + pool.pool)
+            for cluster_data in pool.fill(int(arg)):
+                print('Added cluster: ' + cluster_data['cluster_id'])
+        elif opt in ("-l", "--lease"):
+            print('\n******Lease Cluster: ' + pool.pool)
+            cluster_data = pool.lease()
+            filename = pool.create_properties_file(cluster_data)
+            print("\ncloud_properties_file: " + filename)
+        elif opt in ("-r", "--release"):
+            print('\n******Return Cluster: ' + arg)
+            pool.release(arg)
+            pool.delete_properties_file(arg)
+        elif opt in ("-x", "--drain"):
+            print('\n******Drain Pool: ' + pool.pool)
+            pool.drain()
+        elif opt in ("-s", "--status"):
+            for cluster_id, state, leased_by in pool.status():
+                print(cluster_id + ' ' + state + ' ' + (leased_by or ''))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
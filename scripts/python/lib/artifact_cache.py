@@ -0,0 +1,201 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import requests
+from urllib.parse import urlparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ArtifactCache:
+
+    """Host wide store of downloaded packages, shared by every job and VM on the host
+
+    Packages are stored once by content under objects/<sha512>/<filename> and indexed by build id and
+    file name (by URL for packages outside a build), so a package is downloaded once no matter how many
+    VMs or runs install it. The index records the size and last use of every package, when the cache grows
+    over max_bytes the least recently used packages are removed.
+
+    The directory defaults to ~/.es_build_artifacts and can be set with ES_BUILD_ARTIFACT_CACHE_DIR, the size
+    cap (in GB, default 20) with ES_BUILD_ARTIFACT_CACHE_SIZE. Index updates hold a lock file so concurrent
+    jobs can share the directory.
+
+    Downloads go to tmp/<key hash>.part and resume from where an interrupted one stopped with a range request.
+    The sha512 is computed while streaming and checked against the published <url>.sha512 when there is one,
+    a mismatch discards the download.
+    """
+
+    chunk_size = 1024 * 1024
+    max_workers = 8
+
+    def __init__(self, root=None, max_bytes=None, session=None):
+        self.root = root or os.getenv('ES_BUILD_ARTIFACT_CACHE_DIR', '') or \
+            os.path.expanduser('~/.es_build_artifacts')
+        if max_bytes is None:
+            max_bytes = float(os.getenv('ES_BUILD_ARTIFACT_CACHE_SIZE', 20)) * 1024 ** 3
+        self.max_bytes = int(max_bytes)
+        self.session = session or requests.Session()
+        self.index_file = os.path.join(self.root, 'index.json')
+        self.lock_file = os.path.join(self.root, '.lock')
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+
+    @staticmethod
+    def build_id(url):
+        """Build id of a build package URL (<server>/<build id>/downloads/...), '' for other URLs"""
+        parts = urlparse(url).path.split('/')
+        if 'downloads' in parts[2:]:
+            return parts[parts.index('downloads', 2) - 1]
+        return ''
+
+    @classmethod
+    def key(cls, url, build_id=None):
+        build_id = build_id or cls.build_id(url)
+        if build_id:
+            return build_id + '/' + os.path.basename(urlparse(url).path)
+        return url
+
+    def get(self, url, build_id=None):
+        """Return the cached path of url and mark it used, None if it is not cached"""
+        key = self.key(url, build_id)
+        with self._locked_index() as index:
+            entry = index.get(key)
+            if not entry or not os.path.isfile(self._object_path(entry)):
+                index.pop(key, None)
+                return None
+            entry['last_used'] = time.time()
+            return self._object_path(entry)
+
+    def fetch(self, url, build_id=None):
+        """Return the cached path of url, download it first if it is not cached"""
+        path = self.get(url, build_id)
+        if path:
+            return path
+        partfile = os.path.join(self.root, 'tmp', hashlib.sha1(self.key(url, build_id).encode()).hexdigest() + '.part')
+        with open(partfile + '.lock', 'w') as lock:
+            # Another job may be downloading the same package, wait for it and use its copy
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            path = self.get(url, build_id) or self._store(url, build_id, partfile)
+            # The package is in the cache now, jobs still waiting on this lock find it there
+            try:
+                os.remove(lock.name)
+            except FileNotFoundError:
+                pass
+            return path
+
+    def fetch_many(self, urls, max_workers=None):
+        """Fetch urls concurrently, returns url -> path"""
+        urls = list(dict.fromkeys([url for url in urls if url]))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.max_workers, len(urls))) as executor:
+            return dict(zip(urls, executor.map(self.fetch, urls)))
+
+    def _store(self, url, build_id, partfile):
+        tmpfile, sha512, size = self._download(url, partfile)
+        entry = {'url': url, 'sha512': sha512, 'size': size, 'last_used': time.time(),
+                 'filename': os.path.basename(urlparse(url).path)}
+        path = self._object_path(entry)
+        with self._locked_index() as index:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmpfile, path)
+            index[self.key(url, build_id)] = entry
+            self._evict(index, keep=sha512)
+        return path
+
+    def size(self):
+        with self._locked_index() as index:
+            return sum([entry['size'] for entry in self._objects(index).values()])
+
+    def _download(self, url, partfile):
+        """Stream url into partfile, resuming a previous attempt, and verify it against the published sha512.
+        Returns the file, sha512 and size."""
+        expected = self._published_sha512(url)
+        sha512 = hashlib.sha512()
+        size = 0
+        headers = {}
+        if os.path.isfile(partfile):
+            # Hash what is already there, the rest is hashed as it streams in
+            with open(partfile, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    sha512.update(chunk)
+                    size += len(chunk)
+            if size:
+                headers['Range'] = 'bytes=%d-' % size
+        with self.session.get(url, stream=True, timeout=60, headers=headers) as r:
+            # 416: the range starts at the end, the partial file is already complete
+            if r.status_code != 416:
+                r.raise_for_status()
+                if size and r.status_code != 206:
+                    # Range not supported, start over
+                    sha512 = hashlib.sha512()
+                    size = 0
+                with open(partfile, 'ab' if size else 'wb') as f:
+                    for chunk in r.iter_content(self.chunk_size):
+                        f.write(chunk)
+                        sha512.update(chunk)
+                        size += len(chunk)
+        digest = sha512.hexdigest()
+        if expected and digest != expected:
+            os.remove(partfile)
+            raise ValueError('Checksum mismatch for %s: expected %s, got %s' % (url, expected, digest))
+        return partfile, digest, size
+
+    def _published_sha512(self, url):
+        """sha512 from <url>.sha512, '' if it is not published"""
+        try:
+            r = self.session.get(url + '.sha512', timeout=60)
+        except requests.RequestException:
+            return ''
+        if r.status_code != 200 or not r.text.strip():
+            return ''
+        return r.text.split()[0].lower()
+
+    def _object_path(self, entry):
+        return os.path.join(self.root, 'objects', entry['sha512'], entry['filename'])
+
+    def _objects(self, index):
+        """sha512 -> entry with the latest use of every stored package"""
+        objects = {}
+        for entry in index.values():
+            if entry['sha512'] not in objects or entry['last_used'] > objects[entry['sha512']]['last_used']:
+                objects[entry['sha512']] = entry
+        return objects
+
+    def _evict(self, index, keep=None):
+        objects = self._objects(index)
+        total = sum([entry['size'] for entry in objects.values()])
+        for sha512, entry in sorted(objects.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if sha512 == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, 'objects', sha512), ignore_errors=True)
+            for key in [key for key, value in index.items() if value['sha512'] == sha512]:
+                del index[key]
+            total -= entry['size']
+
+    @contextmanager
+    def _locked_index(self):
+        with open(self.lock_file, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = {}
+            if os.path.isfile(self.index_file):
+                try:
+                    with open(self.index_file) as f:
+                        index = json.load(f)
+                except ValueError:
+                    print('Warning! Ignoring unreadable artifact cache index: ' + self.index_file)
+            yield index
+            tmpfile = self.index_file + '.' + str(os.getpid())
+            with open(tmpfile, 'w') as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+            os.replace(tmpfile, self.index_file)
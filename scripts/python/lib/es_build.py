@@ -10,6 +10,9 @@ import requests
 import re
 import ast
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from es_build_cache import BuildUrlCache
+from es_manifest import BuildManifest
 
 
 class ElasticStackBuild:
@@ -42,6 +45,12 @@ class ElasticStackBuild:
             ES_BUILD_PKG_EXT=tar
             ES_BUILD_ARCH = "darwin 64 bit"
 
+    Set ES_BUILD_USE_MANIFEST=true to answer build server URLs from the build's summary page (one request)
+    instead of checking each one, URLs not covered by it are still checked individually.
+
+    Checked URLs are kept in a cache file in the workspace keyed by build, see BuildUrlCache.
+    To bypass the cache set AIT_SKIP_BUILD_CACHE or pass use_cache=False.
+
     Note: To add upgrade from build information, use UPGRADE_ as a prefix to env variable and follow above settings
         example:
             UPGRADE_ES_BUILD_URL=https://elastic.co/5.6.0
@@ -55,11 +64,28 @@ class ElasticStackBuild:
     _snapshot_servers = ['https://snapshots.elastic.co']
     _valid_windows_extensions = ['zip', 'msi']
     _valid_extensions = ['tar', 'tar.gz', 'rpm', 'deb', 'zip', 'msi']
+    _max_workers = 16
 
-    def __init__(self, upgrade=False):
+    def __init__(self, upgrade=False, use_cache=True, session=None, cache=None):
 
         self.upgrade = upgrade
 
+        self.cache = cache
+        if not cache and use_cache and not os.getenv('AIT_SKIP_BUILD_CACHE'):
+            self.cache = BuildUrlCache()
+
+        # URL -> True/False once checked, and candidate URLs while resolve_all is collecting
+        self._checked = {}
+        self._collect = None
+
+        self.session = session
+        if not session:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self._max_workers,
+                                                    pool_maxsize=self._max_workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
         env_vars = {'_env_elasticsearch_url': 'ES_BUILD_ELASTICSEARCH_URL',
                     '_env_kibana_url': 'ES_BUILD_KIBANA_URL',
                     '_env_logstash_url': 'ES_BUILD_LOGSTASH_URL',
@@ -80,7 +106,8 @@ class ElasticStackBuild:
                     '_env_build_id': 'ES_BUILD_ID',
                     '_env_extension': 'ES_BUILD_PKG_EXT',
                     '_env_architecture': 'ES_BUILD_ARCH',
-                    '_env_oss': 'ES_BUILD_OSS'
+                    '_env_oss': 'ES_BUILD_OSS',
+                    '_env_use_manifest': 'ES_BUILD_USE_MANIFEST'
                     }
 
         for attr in env_vars.keys():
@@ -91,6 +118,10 @@ class ElasticStackBuild:
                 if attr == '_env_oss':
                     value = ast.literal_eval(value.title())
             setattr(self, attr, value)
+        if upgrade:
+            self._env_oss = self._env_oss.lower() == 'true'
+        self._env_use_manifest = self._env_use_manifest.lower() == 'true'
+        self._manifest = None
 
         # If msi is specified, default env_extension to zip, since only elasticsearch has an msi
         self._msi_ext = False
@@ -233,21 +264,129 @@ class ElasticStackBuild:
             platform = 'linux'
         return translate_arch.get(platform + ' ' + ext + ' ' + arch, '')
 
+    @property
+    def build_id(self):
+        return self._env_build_id
+
+    @property
+    def cache_key(self):
+        # Only builds with an id are immutable, anything else is always checked
+        if not self._env_build_id:
+            return ''
+        return '|'.join([self.server, self._env_build_id, self.extension, self.architecture,
+                         str(self._env_oss), str(self._msi_ext)])
+
+    @property
+    def manifest_url(self):
+        if self._env_build_url and urlparse(self._env_build_url).path.endswith(('.html', '.json')):
+            return self.server + '/' + self._env_build_id + '/' + self._env_build_url.rstrip('/').split('/')[-1]
+        return self.server + '/' + self._env_build_id + '/summary.html'
+
+    def load_manifest(self):
+        """Fetch the build manifest once, return it or None if it is not used or unavailable"""
+        if self._manifest is None:
+            self._manifest = False
+            if self._env_use_manifest and self.server and self._env_build_id and \
+                    self.server not in self._public_servers:
+                manifest = BuildManifest(self.version)
+                if manifest.load(self.manifest_url, self.session):
+                    self._manifest = manifest
+        return self._manifest or None
+
+    @classmethod
+    def package_url_attributes(cls):
+        regex = re.compile('[a-z_]+_package_url')
+        return [x for x in cls.__dict__.keys() if regex.search(x)]
+
+    def resolve_all(self, max_workers=None):
+        """Check all package URLs at once and return a dict of property name to URL
+
+        Candidate URLs are formed for every *_package_url property first, then pinged concurrently over
+        the shared session. Results are kept, so reading the properties afterwards makes no requests.
+        """
+        return resolve_builds([self], max_workers)[0]
+
+    @classmethod
+    def upgrade_defined(cls):
+        return any(key.startswith('UPGRADE_ES_BUILD_') and value for key, value in os.environ.items())
+
+    def _unchecked_urls(self):
+        # Form every candidate URL and fill in what the cache already knows, return the rest
+        self._collect = []
+        try:
+            for attr in self.package_url_attributes():
+                getattr(self, attr)
+            candidates = [url for url in dict.fromkeys(self._collect) if url not in self._checked]
+        finally:
+            self._collect = None
+        for url in candidates:
+            found = self._from_cache(url)
+            if found is not None:
+                self._checked[url] = found
+        return [url for url in candidates if url not in self._checked]
+
+    def _record(self, results):
+        if results:
+            self._checked.update(results)
+            self._to_cache(results)
+
     def ping(self, url):
+        """True if url answers 200, False for any other status, None if it could not be reached"""
         try:
             if url:
-                r = requests.head(url)
+                r = self.session.head(url)
                 if r.status_code == 200:
                     return True
                 print('Error! Invalid URL: ' + url)
         except:
             print('Error! Unreachable URL: ' + url)
+            return None
+        return False
+
+    def _check(self, url):
+        if self._collect is not None:
+            self._collect.append(url)
+            return ''
+        if url not in self._checked:
+            found = self._from_cache(url)
+            if found is None:
+                found = self._from_manifest(url)
+                if found is None:
+                    found = self.ping(url)
+                self._to_cache({url: found})
+            self._checked[url] = found
+        if self._checked[url]:
+            return url
+        return ''
+
+    def _from_cache(self, url):
+        if self.cache and self.cache_key:
+            return self.cache.get(self.cache_key, url)
+        return None
+
+    def _from_manifest(self, url):
+        # Only URLs of this build can be answered by its manifest
+        if not url.startswith(self.server + '/' + self._env_build_id + '/downloads/'):
+            return None
+        manifest = self.load_manifest()
+        if not manifest:
+            return None
+        if manifest.lookup(url):
+            return True
+        print('Error! Not in build manifest: ' + url)
         return False
 
+    def _to_cache(self, results):
+        if self.cache and self.cache_key:
+            # Only cache definite answers, an unreachable server is checked again on the next run
+            for url, found in results.items():
+                if found is not None:
+                    self.cache.put(self.cache_key, url, found)
+            self.cache.save()
+
     def _get_url(self, specific_url, name, parent_name='', ext=''):
         if specific_url:
-            if self.ping(specific_url):
-                return specific_url
+            return self._check(specific_url)
         else:
             if not parent_name:
                 parent_name = name
@@ -264,14 +403,12 @@ class ElasticStackBuild:
                 else:
                     url = server + '/' + self._env_build_id + '/downloads/' + parent_name + '/' + name + '-' + version + '.' + ext
 
-                if self.ping(url):
-                    return url
+                return self._check(url)
         return ''
 
     def _get_url_arch(self, specific_url, name, parent_name='', ext=''):
         if specific_url:
-            if self.ping(specific_url):
-                return specific_url
+            return self._check(specific_url)
         else:
             if not parent_name:
                 parent_name = name
@@ -295,6 +432,41 @@ class ElasticStackBuild:
                         url = server + '/' + self._env_build_id + '/downloads/' + parent_name + '/' + name + '-' + version + '-' + arch + '.' + ext
                 else:
                     url = server + '/' + self._env_build_id + '/downloads/' + parent_name + '/' + name + '-' + version + '-' +  arch + '.' + ext
-                if self.ping(url):
-                    return url
+                return self._check(url)
         return ''
+
+
+def resolve_builds(builds, max_workers=None):
+    """Resolve the package URLs of several builds together, ex: base and UPGRADE_ builds
+
+    Manifests are loaded and unchecked URLs are pinged in one bounded pool for all builds, URLs shared
+    between builds are pinged once. Pass the same session and cache to the builds to share connections
+    and cache file. Returns a list with a dict of property name to URL for each build.
+    """
+    pending = {}
+    for build in builds:
+        urls = build._unchecked_urls()
+        if urls:
+            pending[build] = urls
+    if pending:
+        workers = max_workers or ElasticStackBuild._max_workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda build: build.load_manifest(), pending))
+            results = {}
+            to_ping = {}
+            for build, urls in pending.items():
+                results[build] = {}
+                for url in urls:
+                    found = build._from_manifest(url)
+                    if found is not None:
+                        results[build][url] = found
+                    else:
+                        to_ping.setdefault(url, []).append(build)
+            urls = list(to_ping)
+            for url, found in zip(urls, executor.map(lambda url: to_ping[url][0].ping(url), urls)):
+                for build in to_ping[url]:
+                    results[build][url] = found
+        for build, build_results in results.items():
+            build._record(build_results)
+    attrs = ElasticStackBuild.package_url_attributes()
+    return [{attr: getattr(build, attr) for attr in attrs} for build in builds]
@@ -0,0 +1,75 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import os
+import json
+import time
+
+
+class BuildUrlCache:
+
+    """Persistent record of checked package URLs, stored as a json file in the workspace
+
+    Entries are grouped by a build key (server, build id, extension, architecture and oss), each entry
+    holds whether the URL was found and when it was checked. Published builds do not change, so found
+    URLs are kept much longer than misses, which are retried sooner in case the artifact shows up later.
+
+    The file defaults to $WORKSPACE/es_build_cache.json and can be set with ES_BUILD_CACHE_FILE.
+    """
+
+    hit_ttl = 7 * 24 * 60 * 60
+    miss_ttl = 10 * 60
+
+    def __init__(self, filename=None, hit_ttl=None, miss_ttl=None):
+        if not filename:
+            filename = os.getenv('ES_BUILD_CACHE_FILE', '')
+        if not filename:
+            filename = os.path.join(os.getenv('WORKSPACE', '/tmp'), 'es_build_cache.json')
+        self.filename = filename
+        if hit_ttl is not None:
+            self.hit_ttl = hit_ttl
+        if miss_ttl is not None:
+            self.miss_ttl = miss_ttl
+        self._entries = self._load()
+
+    def get(self, key, url):
+        """Return True/False for a cached, unexpired URL, None if it has to be checked"""
+        entry = self._entries.get(key, {}).get(url)
+        if not entry:
+            return None
+        ttl = self.hit_ttl if entry['found'] else self.miss_ttl
+        if time.time() - entry['time'] > ttl:
+            return None
+        return entry['found']
+
+    def put(self, key, url, found):
+        self._entries.setdefault(key, {})[url] = {'found': bool(found), 'time': time.time()}
+
+    def save(self):
+        tmpfile = self.filename + '.' + str(os.getpid())
+        try:
+            with open(tmpfile, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmpfile, self.filename)
+        except OSError:
+            print('Warning! Unable to write build cache file: ' + self.filename)
+
+    def clear(self):
+        self._entries = {}
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def _load(self):
+        if not os.path.isfile(self.filename):
+            return {}
+        try:
+            with open(self.filename) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            print('Warning! Ignoring unreadable build cache file: ' + self.filename)
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
@@ -0,0 +1,74 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import re
+import requests
+from urllib.parse import urljoin, urlparse
+
+
+class BuildManifest:
+
+    """Index of the package URLs published for a build, read from its summary page or json manifest
+
+    The page is fetched once and every download link on it is indexed as:
+        product -> extension -> architecture -> URL
+    where product is the path under downloads/ without the version, for example:
+        https://staging.elastic.co/6.2.3-a605b2d5/downloads/beats/filebeat/filebeat-oss-6.2.3-linux-x86_64.tar.gz
+        product: beats/filebeat/filebeat-oss, extension: tar.gz, architecture: linux-x86_64
+    Packages without an architecture are indexed with an empty string.
+    """
+
+    _extensions = ['tar.gz', 'rpm', 'deb', 'zip', 'msi']
+    _link_regex = re.compile(r'(?:href=|"url":\s*)"([^"]+)"')
+
+    def __init__(self, version):
+        self.version = version
+        self.index = {}
+
+    def load(self, url, session=None):
+        """Fetch and index the page at url, return True if any package was found"""
+        try:
+            r = (session or requests).get(url)
+            if r.status_code != 200:
+                print('Error! Invalid manifest URL: ' + url)
+                return False
+        except:
+            print('Error! Unreachable manifest URL: ' + url)
+            return False
+        self.parse(r.text, url)
+        return len(self.index) > 0
+
+    def parse(self, text, base_url=''):
+        for link in self._link_regex.findall(text):
+            self.add(urljoin(base_url, link))
+
+    def add(self, url):
+        parts = self.split_url(url)
+        if parts:
+            product, ext, arch = parts
+            self.index.setdefault(product, {}).setdefault(ext, {})[arch] = url
+
+    def split_url(self, url):
+        path = urlparse(url).path
+        if '/downloads/' not in path:
+            return None
+        directory, filename = ('/' + path.split('/downloads/', 1)[1]).rsplit('/', 1)
+        ext = next((x for x in self._extensions if filename.endswith('.' + x)), '')
+        if not ext:
+            return None
+        stem = filename[:-len(ext) - 1]
+        marker = '-' + self.version
+        if marker not in stem:
+            return None
+        name, arch = stem.split(marker, 1)
+        return (directory + '/' + name).lstrip('/'), ext, arch.lstrip('-')
+
+    def lookup(self, url):
+        """Return the published URL for the same product, extension and architecture as url, or ''"""
+        parts = self.split_url(url)
+        if not parts:
+            return ''
+        product, ext, arch = parts
+        return self.index.get(product, {}).get(ext, {}).get(arch, '')
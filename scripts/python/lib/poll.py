@@ -0,0 +1,32 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import time
+import random
+
+
+def wait_until(condition, timeout, waiting_for='condition', interval=1, max_interval=30, factor=2, jitter=0.25):
+    """Call condition until it returns a true value, sleeping with jittered exponential backoff in between
+
+    Exceptions raised by condition count as not ready yet. Returns the seconds waited, raises TimeoutError
+    (with the last exception seen) once timeout seconds have passed.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    last_error = None
+    while True:
+        try:
+            if condition():
+                return time.monotonic() - start
+        except Exception as e:
+            last_error = e
+        now = time.monotonic()
+        if now >= deadline:
+            msg = 'Timed out after {0:.0f}s waiting for {1}'.format(now - start, waiting_for)
+            if last_error:
+                msg += ', last error: ' + repr(last_error)
+            raise TimeoutError(msg)
+        time.sleep(min(interval * random.uniform(1 - jitter, 1 + jitter), deadline - now))
+        interval = min(interval * factor, max_interval)
@@ -0,0 +1,186 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import yaml
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class RoleNode:
+
+    def __init__(self, role, after):
+        self.role = role
+        self.name = role['role']
+        self.after = after
+        self.status = 'pending'
+        self.start = None
+        self.end = None
+        self.log_file = None
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return 0
+        return self.end - self.start
+
+
+class RoleScheduler:
+
+    """Run the roles of a playbook concurrently as far as their declared dependencies allow
+
+    A role waits for the roles listed in its ait_after role parameter, the name of a role is its role
+    name, e.g.:
+
+        roles:
+          - { role: xpack_elasticsearch, ait_role: xpack_elasticsearch_install_gencert_config_start_verify }
+          - { role: xpack_kibana, ait_role: xpack_kibana_install_config_start_verify,
+              ait_after: [xpack_elasticsearch] }
+
+    Running the playbook itself with ansible-playbook still runs the roles in order, so the list order
+    has to respect the dependencies.
+
+    Every role runs as its own ansible-playbook process with a copy of the play holding only that role,
+    as soon as all roles it waits for succeeded. Roles that wait for a failed role are skipped.
+    Output goes to <log_dir>/<role>.log, the last lines are printed if a role fails.
+
+    max_parallel limits the number of roles that run at the same time. Package manager installs (deb, rpm)
+    can't run concurrently on one host, use max_parallel=1 for them: roles still run in dependency order.
+    """
+
+    def __init__(self, playbook, inventory=None, limit=None, extra_vars=None, max_parallel=None, log_dir=None):
+        self.playbook = os.path.abspath(playbook)
+        self.inventory = inventory
+        self.limit = limit
+        self.extra_vars = extra_vars or []
+        self.log_dir = log_dir or os.path.join(os.getenv('WORKSPACE', '/tmp'), 'ansible_logs')
+        with open(self.playbook) as f:
+            plays = yaml.safe_load(f)
+        plays_with_roles = [play for play in plays if play.get('roles')]
+        if len(plays_with_roles) != 1:
+            raise ValueError('Playbook must have one play with roles: ' + self.playbook)
+        self.play = plays_with_roles[0]
+        self.nodes = {}
+        for role in self.play['roles']:
+            role = dict(role)
+            after = role.pop('ait_after', None) or []
+            if isinstance(after, str):
+                after = [after]
+            node = RoleNode(role, after)
+            if node.name in self.nodes:
+                raise ValueError('Role listed twice: ' + node.name)
+            self.nodes[node.name] = node
+        self.order = self.sort()
+        self.max_parallel = max(int(max_parallel or len(self.nodes)), 1)
+
+    def sort(self):
+        """Roles in dependency order, raises ValueError for unknown or circular dependencies"""
+        order = []
+        visiting = set()
+
+        def visit(name, path):
+            if name not in self.nodes:
+                raise ValueError('%s waits for unknown role %s' % (path[-1], name))
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError('Circular role dependency: ' + ' -> '.join(path + [name]))
+            visiting.add(name)
+            for dependency in self.nodes[name].after:
+                visit(dependency, path + [name])
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+    def run(self):
+        """Run all roles, returns True if all succeeded"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        workdir = tempfile.mkdtemp(prefix='.ait_roles_', dir=os.path.dirname(self.playbook))
+        self.start = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+                running = {}
+                while True:
+                    for name in self.order:
+                        node = self.nodes[name]
+                        if node.status != 'pending' or len(running) >= self.max_parallel:
+                            continue
+                        statuses = [self.nodes[dependency].status for dependency in node.after]
+                        if any(status in ['failed', 'skipped'] for status in statuses):
+                            node.status = 'skipped'
+                            print('Skip role %s, a role it waits for did not succeed' % name)
+                        elif all(status == 'passed' for status in statuses):
+                            node.status = 'running'
+                            running[executor.submit(self.run_node, node, workdir)] = node
+                    if not running:
+                        break
+                    done = wait(list(running), return_when=FIRST_COMPLETED)[0]
+                    for future in done:
+                        node = running.pop(future)
+                        node.status = 'passed' if future.result() == 0 else 'failed'
+                        print('Role %s %s after %.1fs' % (node.name, node.status, node.duration))
+                        if node.status == 'failed':
+                            self.print_log_tail(node)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.end = time.time()
+        self.print_summary()
+        return all(node.status == 'passed' for node in self.nodes.values())
+
+    def run_node(self, node, workdir):
+        play = dict(self.play, roles=[node.role])
+        node_playbook = os.path.join(workdir, node.name + '.yml')
+        with open(node_playbook, 'w') as f:
+            yaml.safe_dump([play], f, default_flow_style=False)
+        cmd = ['ansible-playbook']
+        if self.inventory:
+            cmd += ['-i', self.inventory]
+        if self.limit:
+            cmd += ['--limit', self.limit]
+        for extra_vars in self.extra_vars:
+            cmd += ['-e', extra_vars]
+        cmd.append(node_playbook)
+        node.log_file = os.path.join(self.log_dir, node.name + '.log')
+        print('Start role %s: %s' % (node.name, ' '.join(cmd)))
+        node.start = time.time()
+        with open(node.log_file, 'w') as log:
+            # Run from the playbook directory so relative paths resolve as for the whole playbook
+            rc = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=os.path.dirname(self.playbook))
+        node.end = time.time()
+        return rc
+
+    def critical_path(self):
+        """Longest chain of role durations through the dependencies, returns (seconds, role names)"""
+        longest = {}
+        for name in self.order:
+            node = self.nodes[name]
+            before = max([longest[dependency] for dependency in node.after], default=(0, []))
+            longest[name] = (before[0] + node.duration, before[1] + [name])
+        return max(longest.values(), default=(0, []))
+
+    def print_log_tail(self, node, lines=40):
+        if not node.log_file or not os.path.isfile(node.log_file):
+            return
+        with open(node.log_file) as f:
+            tail = f.readlines()[-lines:]
+        print('---- %s (%s) ----' % (node.name, node.log_file))
+        print(''.join(tail).rstrip())
+        print('----')
+
+    def print_summary(self):
+        print('%-30s %-8s %8s %8s' % ('role', 'status', 'start', 'duration'))
+        for name in self.order:
+            node = self.nodes[name]
+            start = node.start - self.start if node.start else 0
+            print('%-30s %-8s %8.1f %8.1f' % (name, node.status, start, node.duration))
+        path_seconds, path = self.critical_path()
+        print('Elapsed %.1fs, critical path %.1fs (%s), sequential %.1fs' %
+              (self.end - self.start, path_seconds, ' -> '.join(path),
+               sum([node.duration for node in self.nodes.values()])))
@@ -0,0 +1,44 @@
+'''
+Created on Oct 18, 2026
+
+Download every package of the ansible build variables into the host artifact cache in parallel
+and point the variables at the local copies
+'''
+
+import os
+import sys
+import yaml
+
+from artifact_cache import ArtifactCache
+
+
+def get_package_urls(ansible_vars):
+    return dict((name, value) for name, value in ansible_vars.items()
+                if name.endswith('_package_url') and value)
+
+
+def prefetch(vars_file, workers):
+    with open(vars_file) as f:
+        ansible_vars = yaml.safe_load(f) or {}
+    package_urls = get_package_urls(ansible_vars)
+    print('Prefetch %d packages into the artifact cache with %d workers' % (len(package_urls), workers))
+    cache = ArtifactCache()
+    paths = cache.fetch_many(package_urls.values(), max_workers=workers)
+    # Installs copy <name>_package_file from the host instead of downloading <name>_package_url
+    for name, url in package_urls.items():
+        ansible_vars[name.replace('_package_url', '_package_file')] = paths[url]
+        print(name + ': ' + paths[url])
+    tmpfile = vars_file + '.' + str(os.getpid())
+    with open(tmpfile, 'w') as f:
+        yaml.dump(ansible_vars, f, default_flow_style=False)
+    os.replace(tmpfile, vars_file)
+
+
+if __name__ == '__main__':
+    vars_file = os.getenv('AIT_ANSIBLE_ES_VARS', '') or os.getenv('WORKSPACE', '/tmp') + '/vars.yml'
+    workers = int(os.getenv('ES_BUILD_PREFETCH_WORKERS', 8))
+    try:
+        prefetch(vars_file, workers)
+    except Exception as e:
+        print('Prefetch failed: ' + str(e))
+        sys.exit(1)
@@ -212,6 +212,20 @@ generate_build_variables() {
   fi
 }
 
+# ----------------------------------------------------------------------------
+prefetch_build_artifacts() {
+  # Download build packages into the host artifact cache, only if enabled
+  if [ "$ES_BUILD_ARTIFACT_CACHE" != "true" ] || [ ! -z $AIT_SKIP_GEN_BUILD_VARS ]; then
+    return
+  fi
+  echo_info "Prefetch build packages into artifact cache"
+  python ${AIT_SCRIPTS}/python/prefetch_artifacts.py
+  if [ $? -ne 0 ]; then
+    echo_error "FAILED! Did not prefetch build packages!"
+    exit 1
+  fi
+}
+
 # ----------------------------------------------------------------------------
 run_vm() {
   action=$1; # provision
@@ -274,7 +288,12 @@ run_ansible_playbook() {
   fi
   echo_info "Run playbook: ANSIBLE_GROUP_VARS=${WORKSPACE}/vars.yml AIT_UUT=aithost ansible-playbook -i ${inventory_file} ${AIT_ANSIBLE_PLAYBOOK}"
   cd $(dirname $AIT_ANSIBLE_PLAYBOOK)
-  ANSIBLE_GROUP_VARS=${WORKSPACE}/vars.yml AIT_UUT=aithost ansible-playbook -i ${inventory_file} $AIT_ANSIBLE_PLAYBOOK
+  if [ "$AIT_ANSIBLE_CONCURRENT" == "true" ]; then
+    echo_info "Run playbook roles concurrently"
+    ANSIBLE_GROUP_VARS=${WORKSPACE}/vars.yml AIT_UUT=aithost python ${AIT_SCRIPTS}/python/ansible_role_scheduler.py -i ${inventory_file} $AIT_ANSIBLE_PLAYBOOK
+  else
+    ANSIBLE_GROUP_VARS=${WORKSPACE}/vars.yml AIT_UUT=aithost ansible-playbook -i ${inventory_file} $AIT_ANSIBLE_PLAYBOOK
+  fi
   RC=$?
   if [ $RC -ne 0 ]; then
     echo_error "Playbook failed!"
@@ -5,4 +5,9 @@
 set +x
 source ${AIT_SCRIPTS}/shell/lib/test_funcs.sh
 
+# Run tests in parallel workers (pytest-xdist), each with its own browser and display
+if [ ! -z "${AIT_PYTEST_WORKERS}" ]; then
+  PYTEST_OPTS="-n ${AIT_PYTEST_WORKERS} ${PYTEST_OPTS}"
+fi
+
 pytest_integration_test test_basic_integration ${PYTEST_OPTS}
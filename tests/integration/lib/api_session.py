@@ -4,9 +4,14 @@ Created on Sep 29, 2017
 @author: Liza Dayoub
 '''
 
+import re
+import gzip
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3 import disable_warnings
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from requests.packages.urllib3.util.retry import Retry
 
 
 class ApiSession(object):
@@ -14,6 +19,13 @@ class ApiSession(object):
     classdocs
     '''
 
+    # Callables receiving a sample dict for every request made by any session:
+    # method, endpoint (path template), status, bytes_sent, bytes_received, latency (seconds)
+    _request_hooks = []
+
+    # Path segments that vary between calls (dated indices, ids, patterns) are collapsed in endpoint names
+    _variable_segment = re.compile(r'.*[0-9*,:].*')
+
     def __init__(self, **kwargs):
         '''
         Constructor
@@ -23,6 +35,16 @@ class ApiSession(object):
         self.password = kwargs.get('password')
         self.insecure = kwargs.get('insecure') or True
         self.auth = kwargs.get('auth') or False
+        # Connections kept per host, block waits for a free connection instead of opening extra ones
+        self.pool_maxsize = kwargs.get('pool_maxsize') or 10
+        self.pool_block = str(kwargs.get('pool_block')).lower() == 'true'
+        # Transport retries for connection errors and 502/503/504 on idempotent requests
+        self.retries = kwargs.get('retries', 3)
+        self.retry_backoff = kwargs.get('retry_backoff', 0.5)
+        # Seconds per request, a call can pass its own timeout (None waits as long as it takes)
+        self.timeout = kwargs.get('timeout') or 60
+        # Gzip request bodies
+        self.compress = str(kwargs.get('compress')).lower() == 'true'
 
         cfg = kwargs.get('cfg')
         if cfg:
@@ -32,11 +54,24 @@ class ApiSession(object):
             self.password = cfg.get('password') or self.password
             if cfg.get('xpack'):
                 self.auth = True
+            self.pool_maxsize = int(cfg.get('pool_maxsize') or self.pool_maxsize)
+            self.pool_block = str(cfg.get('pool_block')).lower() == 'true' or self.pool_block
+            if cfg.get('retries') is not None:
+                self.retries = int(cfg.get('retries'))
+            if cfg.get('retry_backoff') is not None:
+                self.retry_backoff = float(cfg.get('retry_backoff'))
+            self.timeout = float(cfg.get('timeout') or self.timeout)
+            self.compress = str(cfg.get('compress')).lower() == 'true' or self.compress
 
         if not self.url:
             raise AttributeError('URL can not be empty')
 
         self.session = requests.Session()
+        retry = Retry(total=self.retries, backoff_factor=self.retry_backoff,
+                      status_forcelist=[502, 503, 504], raise_on_status=False)
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize, pool_block=self.pool_block, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
         if self.insecure:
             disable_warnings(InsecureRequestWarning)
@@ -45,24 +80,79 @@ class ApiSession(object):
             self.session.auth = (self.username, self.password)
 
     def delete(self, path, **kwargs):
-        response = self.session.delete(self.url + path, **kwargs)
-        response.raise_for_status()
-        return response
+        return self.request('DELETE', path, **kwargs)
 
     def get(self, path, **kwargs):
-        response = self.session.get(self.url + path, **kwargs)
-        response.raise_for_status()
-        return response
+        return self.request('GET', path, **kwargs)
 
     def post(self, path, **kwargs):
-        response = self.session.post(self.url + path, **kwargs)
-        response.raise_for_status()
-        return response
+        return self.request('POST', path, **kwargs)
 
     def put(self, path, **kwargs):
-        response = self.session.put(self.url + path, **kwargs)
+        return self.request('PUT', path, **kwargs)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.compress and kwargs.get('data'):
+            data = kwargs['data']
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            if isinstance(data, bytes):
+                kwargs['data'] = gzip.compress(data, compresslevel=1)
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Encoding': 'gzip'})
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, self.url + path, **kwargs)
+        finally:
+            self.record_request(method, path, response.status_code if response is not None else None,
+                                self.body_size(kwargs.get('data')), self.response_size(response, kwargs.get('stream')),
+                                time.perf_counter() - start)
         response.raise_for_status()
         return response
 
     def update_headers(self, info):
         self.session.headers.update(info)
+
+    @classmethod
+    def add_request_hook(cls, hook):
+        cls._request_hooks.append(hook)
+
+    @classmethod
+    def remove_request_hook(cls, hook):
+        if hook in cls._request_hooks:
+            cls._request_hooks.remove(hook)
+
+    @classmethod
+    def record_request(cls, method, path, status, bytes_sent, bytes_received, latency):
+        if not cls._request_hooks:
+            return
+        sample = {'method': method,
+                  'endpoint': cls.path_template(path),
+                  'status': status,
+                  'bytes_sent': bytes_sent,
+                  'bytes_received': bytes_received,
+                  'latency': latency}
+        for hook in list(cls._request_hooks):
+            hook(sample)
+
+    @staticmethod
+    def body_size(data):
+        return len(data) if isinstance(data, (bytes, str)) else 0
+
+    @staticmethod
+    def response_size(response, stream=False):
+        if response is None:
+            return 0
+        if stream:
+            return int(response.headers.get('Content-Length', 0))
+        return len(response.content)
+
+    @classmethod
+    def path_template(cls, path):
+        '''
+        Path without query string and with variable segments replaced, e.g.
+        /filebeat-2018.01.29/_count?q=* -> /{}/_count
+        '''
+        segments = path.split('?', 1)[0].split('/')
+        return '/'.join(['{}' if cls._variable_segment.match(segment) else segment for segment in segments])
@@ -0,0 +1,153 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import gzip
+import time
+import asyncio
+import aiohttp
+from lib.api_session import ApiSession
+
+
+class AsyncApiSession(object):
+    '''
+    asyncio counterpart of ApiSession for tests that hit many endpoints at once
+
+    Takes the same arguments and cfg keys as ApiSession, requests are coroutines:
+        async with AsyncApiSession(cfg=config.elasticsearch) as api:
+            response = await api.get('/_cluster/health')
+            health = await response.json()
+    Responses are aiohttp responses with the body already read, they can be used after the session is closed.
+    Requests are reported to the ApiSession request hooks like synchronous ones.
+    fan_out() sends many requests with a concurrency limit, fan_out_sync() does it from synchronous code.
+    '''
+
+    def __init__(self, **kwargs):
+        '''
+        Constructor
+        '''
+        self.url = kwargs.get('url')
+        self.username = kwargs.get('username')
+        self.password = kwargs.get('password')
+        self.insecure = kwargs.get('insecure') or True
+        self.auth = kwargs.get('auth') or False
+        self.pool_maxsize = kwargs.get('pool_maxsize') or 10
+        self.timeout = kwargs.get('timeout') or 60
+        self.compress = str(kwargs.get('compress')).lower() == 'true'
+        self.concurrency = kwargs.get('concurrency') or 10
+
+        cfg = kwargs.get('cfg')
+        if cfg:
+            self.url = cfg.get('url') or self.url
+            self.url = self.url.strip('/')
+            self.username = cfg.get('username') or self.username
+            self.password = cfg.get('password') or self.password
+            if cfg.get('xpack'):
+                self.auth = True
+            self.pool_maxsize = int(cfg.get('pool_maxsize') or self.pool_maxsize)
+            self.timeout = float(cfg.get('timeout') or self.timeout)
+            self.compress = str(cfg.get('compress')).lower() == 'true' or self.compress
+
+        if not self.url:
+            raise AttributeError('URL can not be empty')
+
+        self.headers = {}
+        self.session = None
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def open(self):
+        '''
+        Create the aiohttp session, must be called with the event loop that will run the requests
+        '''
+        if self.session:
+            return
+        if self.insecure:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize, ssl=False)
+        else:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize)
+        auth = None
+        if self.auth and self.username and self.password:
+            auth = aiohttp.BasicAuth(self.username, self.password)
+        self.session = aiohttp.ClientSession(connector=connector, auth=auth,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def delete(self, path, **kwargs):
+        return await self.request('DELETE', path, **kwargs)
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def put(self, path, **kwargs):
+        return await self.request('PUT', path, **kwargs)
+
+    async def request(self, method, path, **kwargs):
+        self.open()
+        kwargs['headers'] = dict(self.headers, **(kwargs.get('headers') or {}))
+        if self.compress and kwargs.get('data'):
+            data = kwargs['data']
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            if isinstance(data, bytes):
+                kwargs['data'] = gzip.compress(data, compresslevel=1)
+                kwargs['headers']['Content-Encoding'] = 'gzip'
+        start = time.perf_counter()
+        status = None
+        body = b''
+        try:
+            async with self.session.request(method, self.url + path, **kwargs) as response:
+                status = response.status
+                body = await response.read()
+        finally:
+            ApiSession.record_request(method, path, status, ApiSession.body_size(kwargs.get('data')), len(body),
+                                      time.perf_counter() - start)
+        response.raise_for_status()
+        return response
+
+    def update_headers(self, info):
+        self.headers.update(info)
+
+    async def fan_out(self, calls, concurrency=None, return_exceptions=False):
+        '''
+        Send calls concurrently, at most concurrency at a time, and return the responses in call order
+        Each call is a path (GET) or a tuple of (method, path) or (method, path, kwargs).
+        With return_exceptions the exception raised by a failed call is returned in its place.
+        '''
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def send(call):
+            if isinstance(call, str):
+                call = ('GET', call)
+            method, path = call[0], call[1]
+            kwargs = call[2] if len(call) > 2 else {}
+            async with semaphore:
+                return await self.request(method, path, **kwargs)
+
+        return await asyncio.gather(*[send(call) for call in calls], return_exceptions=return_exceptions)
+
+    def fan_out_sync(self, calls, concurrency=None, return_exceptions=False):
+        '''
+        Run fan_out on a private event loop and close the session afterwards, for synchronous tests
+        '''
+        loop = asyncio.new_event_loop()
+        try:
+            async def run():
+                async with self:
+                    return await self.fan_out(calls, concurrency, return_exceptions)
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
@@ -38,6 +38,9 @@ elasticsearch = Munch()
 kibana = Munch()
 
 testing.xpack = os.getenv('AIT_XPACK', False)
+testing.discover_hits = os.getenv('AIT_DISCOVER_HITS', 'hybrid')
+testing.timing_report = os.getenv('AIT_TIMING_REPORT', os.path.join(os.getenv('WORKSPACE', os.getcwd()),
+                                                                    'timing_report'))
 
 elasticsearch.protocol = os.getenv('AIT_ELASTICSEARCH_PROTOCOL', 'http')
 elasticsearch.host = os.getenv('AIT_ELASTICSEARCH_HOST', 'localhost')
@@ -46,6 +49,12 @@ elasticsearch.username = os.getenv('AIT_ELASTICSEARCH_USERNAME', 'elastic')
 elasticsearch.password = os.getenv('AIT_ELASTICSEARCH_PASSWORD', 'changeme')
 elasticsearch.xpack = testing.xpack
 elasticsearch.url = os.getenv('AIT_ELASTICSEARCH_URL', build_url(elasticsearch, testing))
+elasticsearch.pool_maxsize = os.getenv('AIT_ELASTICSEARCH_POOL_MAXSIZE', 10)
+elasticsearch.pool_block = os.getenv('AIT_ELASTICSEARCH_POOL_BLOCK', 'false').lower() == 'true'
+elasticsearch.retries = os.getenv('AIT_ELASTICSEARCH_RETRIES', 3)
+elasticsearch.retry_backoff = os.getenv('AIT_ELASTICSEARCH_RETRY_BACKOFF', 0.5)
+elasticsearch.timeout = os.getenv('AIT_ELASTICSEARCH_TIMEOUT', 60)
+elasticsearch.compress = os.getenv('AIT_ELASTICSEARCH_COMPRESS', 'false').lower() == 'true'
 print(elasticsearch)
 
 kibana.protocol = os.getenv('AIT_KIBANA_PROTOCOL', 'http')
@@ -55,6 +64,9 @@ kibana.username = os.getenv('AIT_KIBANA_USERNAME', 'kibana')
 kibana.password = os.getenv('AIT_KIBANA_PASSWORD', 'changeme')
 kibana.xpack = testing.xpack
 kibana.url = os.getenv('AIT_KIBANA_URL', build_url(kibana, testing))
+kibana.cookie_file = os.getenv('AIT_KIBANA_COOKIE_FILE', os.path.join(os.getenv('WORKSPACE', os.getcwd()),
+                                                                      'kibana_session.json'))
+kibana.session_ttl = os.getenv('AIT_KIBANA_SESSION_TTL', 3600)
 print(kibana)
 
 browser.type = os.getenv('AIT_BROWSER', Chrome)
@@ -6,6 +6,12 @@ Created on Sep 29, 2017
 
 
 import os.path
+import json
+import time
+import random
+import requests
+from munch import Munch
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from lib.api_session import ApiSession
 
 
@@ -14,11 +20,27 @@ class ElasticsearchBulkApi:
     Elasticsearch bulk api
     '''
 
+    # Actions without a source line following them
+    _no_source_actions = ['delete']
+
+    # Rejections worth resending, only these items are retried with backoff
+    retry_statuses = [429, 503]
+    max_retries = 5
+    retry_backoff = 0.5
+
+    # Seconds to wait for a bulk or refresh response, None waits as long as it takes: refresh=wait_for
+    # and large chunks can outlast the session timeout
+    timeout = None
+
+    # Only what is needed to account for every item
+    _filter_path = 'filter_path=errors,items.*.status,items.*.error.type'
+
     def __init__(self, api_session: ApiSession, **kwargs):
         '''
         Constructor
         '''
         self.api = api_session
+        self.timeout = kwargs.get('timeout', self.timeout)
         self.api.update_headers({'Content-Type': 'application/x-ndjson'})
 
     def post(self, data=None, file=None, index=None, doc_type=None, refresh_wait=True, **kwargs):
@@ -26,12 +48,7 @@ class ElasticsearchBulkApi:
             raise IOError('data or file must be specified')
         if file and not os.path.isfile(file):
             raise FileNotFoundError('File not found: ' + file)
-        if index and doc_type:
-            path = ('/%s/%s/_bulk' % (index, doc_type))
-        elif index:
-            path = ('/%s/_bulk' % (index))
-        else:
-            path = '/_bulk'
+        path = self._bulk_path(index, doc_type)
 
         if refresh_wait:
             path += '?refresh=wait_for'
@@ -39,6 +56,143 @@ class ElasticsearchBulkApi:
         if file:
             data = open(file, 'rb').read()
 
-        response = self.api.post(path, data=data)
+        items = next(self.iter_chunks(data.splitlines(True), float('inf'), float('inf')), [])
+        summary, response = self._send_items(path, items)
+        if summary.failed:
+            print('Bulk failed items: %d %s' % (summary.failed, summary.errors))
 
         return response
+
+    def post_chunked(self, file=None, lines=None, index=None, doc_type=None, chunk_bytes=5 * 1024 * 1024,
+                     chunk_docs=5000, workers=4, refresh=True):
+        '''
+        Stream ndjson bulk lines from file (or any iterable of lines) and send them in chunks over
+        concurrent requests, at most workers chunks are in flight so memory stays bounded.
+        Chunks are split on action/source boundaries and limited by chunk_bytes and chunk_docs.
+        The index is refreshed once at the end instead of on every request.
+        Items rejected with 429/503 are resent with backoff, returns a summary:
+        indexed, failed, retried, errors (count per error type) and latencies (seconds per chunk).
+        '''
+        if not file and lines is None:
+            raise IOError('file or lines must be specified')
+        if file and not os.path.isfile(file):
+            raise FileNotFoundError('File not found: ' + file)
+        path = self._bulk_path(index, doc_type)
+
+        summary = Munch(indexed=0, failed=0, retried=0, errors={}, latencies=[])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            f = open(file, 'rb') if file else None
+            try:
+                for chunk in self.iter_chunks(f or lines, chunk_bytes, chunk_docs):
+                    if len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._add_summary(summary, done)
+                    pending.add(executor.submit(self._send_items, path, chunk))
+                done, pending = wait(pending)
+                self._add_summary(summary, done)
+            finally:
+                if f:
+                    f.close()
+
+        if refresh:
+            self.api.post('/%s/_refresh' % index if index else '/_refresh', timeout=self.timeout)
+        return summary
+
+    def iter_chunks(self, lines, chunk_bytes, chunk_docs):
+        '''
+        Group ndjson bulk lines into chunks of items, an item is an action line with its source line
+        '''
+        chunk = []
+        size = 0
+        docs = 0
+        lines = iter(lines)
+        for action in lines:
+            if isinstance(action, str):
+                action = action.encode('utf-8')
+            if not action.strip():
+                continue
+            if not action.endswith(b'\n'):
+                action += b'\n'
+            item = action
+            if next(iter(json.loads(action.decode('utf-8')))) not in self._no_source_actions:
+                source = next(lines, None)
+                if source is None:
+                    raise ValueError('Bulk action without source: ' + action.decode('utf-8'))
+                if isinstance(source, str):
+                    source = source.encode('utf-8')
+                if not source.endswith(b'\n'):
+                    source += b'\n'
+                item += source
+            if chunk and (size + len(item) > chunk_bytes or docs >= chunk_docs):
+                yield chunk
+                chunk = []
+                size = 0
+                docs = 0
+            chunk.append(item)
+            size += len(item)
+            docs += 1
+        if chunk:
+            yield chunk
+
+    def _send_items(self, path, items):
+        '''
+        Send items as one bulk request, resend only the items rejected with a retry status.
+        Returns a summary for the items and the last response.
+        '''
+        path += ('&' if '?' in path else '?') + self._filter_path
+        summary = Munch(indexed=0, failed=0, retried=0, errors={}, latencies=[])
+        start = time.monotonic()
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if not items:
+                break
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                summary.retried += len(items)
+            try:
+                response = self.api.post(path, data=b''.join(items), timeout=self.timeout)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in self.retry_statuses:
+                    continue
+                raise
+            result = response.json()
+            if not result.get('errors'):
+                summary.indexed += len(items)
+                items = []
+                break
+            rejected = []
+            for item, item_result in zip(items, result.get('items', [])):
+                item_result = next(iter(item_result.values()))
+                status = item_result.get('status', 0)
+                if status < 300:
+                    summary.indexed += 1
+                elif status in self.retry_statuses:
+                    rejected.append(item)
+                else:
+                    summary.failed += 1
+                    error = item_result.get('error', {}).get('type', str(status))
+                    summary.errors[error] = summary.errors.get(error, 0) + 1
+            items = rejected
+        if items:
+            summary.failed += len(items)
+            summary.errors['retries_exhausted'] = len(items)
+        summary.latencies.append(time.monotonic() - start)
+        return summary, response
+
+    def _add_summary(self, summary, futures):
+        for future in futures:
+            chunk_summary, response = future.result()
+            summary.indexed += chunk_summary.indexed
+            summary.failed += chunk_summary.failed
+            summary.retried += chunk_summary.retried
+            summary.latencies.extend(chunk_summary.latencies)
+            for error, count in chunk_summary.errors.items():
+                summary.errors[error] = summary.errors.get(error, 0) + count
+
+    def _bulk_path(self, index=None, doc_type=None):
+        if index and doc_type:
+            return '/%s/%s/_bulk' % (index, doc_type)
+        elif index:
+            return '/%s/_bulk' % (index)
+        return '/_bulk'
@@ -0,0 +1,28 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+from lib.api_session import ApiSession
+
+
+class ElasticsearchCountApi:
+    '''
+    Elasticsearch count api
+    '''
+
+    def __init__(self, api_session: ApiSession, **kwargs):
+        '''
+        Constructor
+        '''
+        self.api = api_session
+
+    def count(self, index='*', time_field=None, gte=None, lte='now'):
+        '''
+        Number of documents in index (a name or pattern), with time_field and gte only those in the time range
+        '''
+        body = {}
+        if time_field and gte:
+            body = {'query': {'range': {time_field: {'gte': gte, 'lte': lte}}}}
+        response = self.api.post('/%s/_count' % index, json=body, headers={'Content-Type': 'application/json'})
+        return response.json()['count']
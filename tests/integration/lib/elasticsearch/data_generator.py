@@ -0,0 +1,161 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import json
+import random
+import datetime
+from fnmatch import fnmatch
+
+
+class BulkDataGenerator:
+    '''
+    Seeded generator of ndjson bulk lines, documents are produced lazily so any count can be streamed
+    into ElasticsearchBulkApi.post_chunked(lines=generator) without holding them in memory.
+
+    Kinds:
+        accounts: bank account documents like data/accounts.json, index 'bank'
+        filebeat, metricbeat, packetbeat: beat documents with @timestamp, daily <kind>-YYYY.MM.DD indices
+        logstash: apache access log documents, daily logstash-YYYY.MM.DD indices
+
+    Timestamps are spread evenly over span_seconds ending at end (default: now), so with the default
+    span every document falls in Kibana's default time range.
+    counts holds the number of documents generated per index, use expected_count() to get the
+    number for an index pattern once the lines have been consumed.
+    '''
+
+    KINDS = ['accounts', 'filebeat', 'metricbeat', 'packetbeat', 'logstash']
+
+    _first_names = ['Amber', 'Hattie', 'Nanette', 'Dale', 'Elinor', 'Virginia', 'Dillard', 'Mcgee', 'Aurelia',
+                    'Fulton', 'Burton', 'Josie', 'Hughes', 'Hall', 'Deidre', 'Ratliff', 'Winnie', 'Rodriquez']
+    _last_names = ['Duke', 'Bond', 'Bates', 'Adams', 'Ratliff', 'Mayer', 'Mcpherson', 'Harding', 'Holland',
+                   'Allison', 'Flores', 'Sosa', 'Wyatt', 'Shields', 'Foster', 'Hess', 'Nolan', 'Pittman']
+    _employers = ['Pyrami', 'Netagy', 'Quility', 'Boink', 'Scentric', 'Filodyne', 'Quailcom', 'Zilidium']
+    _streets = ['Holmes Lane', 'Bristol Street', 'Madison Street', 'Hamilton Walk', 'Kings Place', 'Bay Avenue']
+    _cities = ['Brogan', 'Dante', 'Nogal', 'Orick', 'Yardville', 'Shaft', 'Dixie', 'Lopezo']
+    _states = ['IL', 'TN', 'VA', 'PA', 'MD', 'WA', 'ND', 'AL', 'OR', 'CA', 'NY', 'TX']
+    _hosts = ['web-01', 'web-02', 'db-01', 'cache-01', 'worker-01']
+    _paths = ['/', '/index.html', '/app/kibana', '/api/status', '/search', '/login', '/static/app.js']
+    _verbs = ['GET', 'GET', 'GET', 'POST', 'PUT', 'DELETE']
+    _responses = [200, 200, 200, 200, 201, 301, 304, 404, 500]
+    _messages = ['Starting service', 'Connection accepted', 'Request completed', 'Cache miss',
+                 'Slow query detected', 'Connection closed', 'Configuration reloaded']
+
+    def __init__(self, kind, count, seed=0, index=None, doc_type=None, end=None, span_seconds=600,
+                 version='6.0.0'):
+        if kind not in self.KINDS:
+            raise AttributeError('Invalid kind: %s, valid kinds: %s' % (kind, self.KINDS))
+        self.kind = kind
+        self.count = count
+        self.seed = seed
+        self.index = index
+        self.doc_type = doc_type or ('account' if kind == 'accounts' else 'doc')
+        self.end = end or datetime.datetime.utcnow()
+        self.span_seconds = span_seconds
+        self.version = version
+        self.counts = {}
+
+    def __iter__(self):
+        return self.lines()
+
+    def lines(self):
+        '''
+        Yield action and source lines (bytes, newline terminated), counts are reset on each pass
+        '''
+        rand = random.Random(self.seed)
+        make_doc = getattr(self, '_' + self.kind)
+        start = self.end - datetime.timedelta(seconds=self.span_seconds)
+        step = self.span_seconds / max(self.count, 1)
+        self.counts = {}
+        for i in range(self.count):
+            timestamp = start + datetime.timedelta(seconds=i * step)
+            doc = make_doc(rand, i, timestamp)
+            index = self.index or self._default_index(timestamp)
+            self.counts[index] = self.counts.get(index, 0) + 1
+            action = {'index': {'_index': index, '_type': self.doc_type, '_id': str(i)}}
+            yield (json.dumps(action, separators=(',', ':')) + '\n').encode('utf-8')
+            yield (json.dumps(doc, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def expected_count(self, pattern='*'):
+        return sum([count for index, count in self.counts.items() if fnmatch(index, pattern)])
+
+    def _default_index(self, timestamp):
+        if self.kind == 'accounts':
+            return 'bank'
+        return self.kind + '-' + timestamp.strftime('%Y.%m.%d')
+
+    def _timestamp(self, timestamp):
+        return timestamp.strftime('%Y-%m-%dT%H:%M:%S.') + '%03dZ' % (timestamp.microsecond // 1000)
+
+    def _beat(self, rand):
+        host = rand.choice(self._hosts)
+        return {'name': host, 'hostname': host, 'version': self.version}
+
+    def _accounts(self, rand, i, timestamp):
+        first = rand.choice(self._first_names)
+        last = rand.choice(self._last_names)
+        employer = rand.choice(self._employers)
+        return {'account_number': i,
+                'balance': rand.randint(1000, 50000),
+                'firstname': first,
+                'lastname': last,
+                'age': rand.randint(20, 40),
+                'gender': rand.choice('MF'),
+                'address': '%d %s' % (rand.randint(100, 999), rand.choice(self._streets)),
+                'employer': employer,
+                'email': (first + last + '@' + employer + '.com').lower(),
+                'city': rand.choice(self._cities),
+                'state': rand.choice(self._states)}
+
+    def _filebeat(self, rand, i, timestamp):
+        return {'@timestamp': self._timestamp(timestamp),
+                'beat': self._beat(rand),
+                'source': '/var/log/' + rand.choice(['syslog', 'auth.log', 'messages']),
+                'offset': i * 120,
+                'message': rand.choice(self._messages),
+                'prospector': {'type': 'log'}}
+
+    def _metricbeat(self, rand, i, timestamp):
+        user = round(rand.random(), 4)
+        system = round(rand.random() * (1 - user), 4)
+        return {'@timestamp': self._timestamp(timestamp),
+                'beat': self._beat(rand),
+                'metricset': {'module': 'system', 'name': 'cpu', 'rtt': rand.randint(50, 500)},
+                'system': {'cpu': {'cores': 4,
+                                   'user': {'pct': user},
+                                   'system': {'pct': system},
+                                   'idle': {'pct': round(1 - user - system, 4)}}}}
+
+    def _packetbeat(self, rand, i, timestamp):
+        return {'@timestamp': self._timestamp(timestamp),
+                'beat': self._beat(rand),
+                'type': 'http',
+                'client_ip': '10.0.%d.%d' % (rand.randint(0, 255), rand.randint(1, 254)),
+                'ip': '10.1.0.%d' % rand.randint(1, 254),
+                'port': 80,
+                'method': rand.choice(self._verbs),
+                'path': rand.choice(self._paths),
+                'status': 'OK',
+                'responsetime': rand.randint(1, 300),
+                'http': {'response': {'code': rand.choice(self._responses)}}}
+
+    def _logstash(self, rand, i, timestamp):
+        clientip = '192.168.%d.%d' % (rand.randint(0, 255), rand.randint(1, 254))
+        verb = rand.choice(self._verbs)
+        request = rand.choice(self._paths)
+        response = rand.choice(self._responses)
+        size = rand.randint(200, 20000)
+        message = '%s - - [%s] "%s %s HTTP/1.1" %d %d' % (clientip, timestamp.strftime('%d/%b/%Y:%H:%M:%S +0000'),
+                                                          verb, request, response, size)
+        return {'@timestamp': self._timestamp(timestamp),
+                '@version': '1',
+                'host': rand.choice(self._hosts),
+                'path': '/var/log/apache2/access.log',
+                'type': 'apache_access',
+                'message': message,
+                'clientip': clientip,
+                'verb': verb,
+                'request': request,
+                'response': response,
+                'bytes': size}
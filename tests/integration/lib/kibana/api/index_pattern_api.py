@@ -0,0 +1,119 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import re
+import requests
+from lib.api_session import ApiSession
+from lib.kibana.management.index_patterns_page import IndexPatternsPage
+
+
+class KibanaIndexPatternApi:
+    '''
+    Kibana index patterns through the saved objects api, ApiSession must point at Kibana
+
+    With a namespace (e.g. one per parallel test worker) patterns get the id <namespace>-<title> unless
+    one is given, and only patterns with such ids are reused, so workers never share or collide on a pattern.
+    '''
+
+    TYPE = 'index-pattern'
+
+    def __init__(self, api_session: ApiSession, namespace=None, **kwargs):
+        '''
+        Constructor
+        '''
+        self.api = api_session
+        self.namespace = namespace
+        self.api.update_headers({'kbn-xsrf': 'true'})
+
+    def find_all(self):
+        '''
+        Returns title -> id of all index patterns, of this namespace only if it is set
+        '''
+        response = self.api.get('/api/saved_objects/_find',
+                                params={'type': self.TYPE, 'fields': 'title', 'per_page': 10000})
+        patterns = {}
+        for obj in response.json()['saved_objects']:
+            if not self.namespace or obj['id'].startswith(self.namespace + '-'):
+                patterns[obj['attributes']['title']] = obj['id']
+        return patterns
+
+    def find(self, title):
+        return self.find_all().get(title)
+
+    def create(self, title, time_field=None, pattern_id=None):
+        return self.create_many([(title, time_field, pattern_id)])[0]
+
+    def create_many(self, patterns):
+        '''
+        Create index patterns that do not exist yet, patterns are titles or tuples of (title, time_field, id).
+        Existing patterns are looked up and new ones created in a single bulk request.
+        The first pattern becomes Kibana's default index if there is none, so Discover opens without a redirect.
+        Returns the ids in the order of patterns.
+        '''
+        patterns = [self._normalize(pattern) for pattern in patterns]
+        existing = self.find_all()
+        objects = []
+        for title, time_field, pattern_id in patterns:
+            if title in existing:
+                continue
+            attributes = {'title': title}
+            if time_field:
+                attributes['timeFieldName'] = time_field
+            obj = {'type': self.TYPE, 'attributes': attributes}
+            if pattern_id:
+                obj['id'] = pattern_id
+            objects.append(obj)
+            existing[title] = None
+        if objects:
+            for title, pattern_id in zip([obj['attributes']['title'] for obj in objects], self._bulk_create(objects)):
+                existing[title] = pattern_id
+        ids = [existing[title] for title, time_field, pattern_id in patterns]
+        if ids and not self.get_default():
+            self.set_default(ids[0])
+        return ids
+
+    def delete(self, pattern_id):
+        self.api.delete('/api/saved_objects/%s/%s' % (self.TYPE, pattern_id))
+
+    def get_default(self):
+        response = self.api.get('/api/kibana/settings')
+        return response.json()['settings'].get('defaultIndex', {}).get('userValue')
+
+    def set_default(self, pattern_id):
+        self.api.post('/api/kibana/settings', json={'changes': {'defaultIndex': pattern_id}})
+
+    def _bulk_create(self, objects):
+        try:
+            response = self.api.post('/api/saved_objects/_bulk_create', json=objects)
+        except requests.HTTPError as e:
+            # Kibana versions before _bulk_create, create one by one
+            if e.response is None or e.response.status_code != 404:
+                raise
+            return [self._create(obj) for obj in objects]
+        ids = []
+        for obj in response.json()['saved_objects']:
+            if 'error' in obj:
+                raise requests.HTTPError('Unable to create index pattern: %s %s' % (obj.get('id'), obj['error']))
+            ids.append(obj['id'])
+        return ids
+
+    def _create(self, obj):
+        path = '/api/saved_objects/' + self.TYPE
+        if obj.get('id'):
+            path += '/' + obj['id']
+        response = self.api.post(path, json={'attributes': obj['attributes']})
+        return response.json()['id']
+
+    def _normalize(self, pattern):
+        if isinstance(pattern, str):
+            pattern = (pattern,)
+        title, time_field, pattern_id = (tuple(pattern) + (None, None))[:3]
+        # The page's time filter choices without a field mean no time field
+        if time_field in [IndexPatternsPage.TIME_FILTER_NOT_APPLICABLE, IndexPatternsPage.TIME_FILTER_DO_NOT_USE] or \
+                not isinstance(time_field, str):
+            time_field = None
+        if not pattern_id and self.namespace:
+            pattern_id = self.namespace + '-' + (re.sub('[^a-z0-9]+', '-', title.lower()).strip('-') or 'all')
+        return title, time_field, pattern_id
@@ -6,13 +6,16 @@ Created on Sep 26, 2017
 
 
 from lib.kibana.kibana_basepage import KibanaBasePage, data_test_subj
-from webium import Find, Finds
+from webium import Find
 from selenium.webdriver.common.by import By
 from webium.wait import wait
-from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.keys import Keys
+from lib import config
+from lib.api_session import ApiSession
+from lib.elasticsearch.api.count_api import ElasticsearchCountApi
 import locale
+import datetime
 
 
 class DiscoverPage(KibanaBasePage):
@@ -20,6 +23,14 @@ class DiscoverPage(KibanaBasePage):
     Kibana Discover Page
     '''
 
+    HITS_UI = 'ui'
+    HITS_HYBRID = 'hybrid'
+    HITS_API = 'api'
+
+    # Kibana's default time range, the last 15 minutes
+    DEFAULT_TIME_RANGE = datetime.timedelta(minutes=15)
+
+    query_hits_label_selector = data_test_subj('discoverQueryHits')['value']
     query_hits_label = Find(**data_test_subj('discoverQueryHits'))
     new_button = Find(**data_test_subj('discoverNewButton'))
     save_button = Find(**data_test_subj('discoverSaveButton'))
@@ -27,15 +38,20 @@ class DiscoverPage(KibanaBasePage):
     share_button = Find(**data_test_subj('discoverShareButton'))
     time_picker_button = Find(**data_test_subj('globalTimepickerButton'))
 
-    sidebar_item_fields = Finds(by=By.CLASS_NAME, value='sidebar-item')
-
     def __init__(self, **kwargs):
         '''
         Constructor
         '''
+        self.api_session = kwargs.pop('api_session', None)
         super().__init__(**kwargs)
         self.url += '/app/kibana#/discover'
 
+    @property
+    def count_api(self):
+        if not self.api_session:
+            self.api_session = ApiSession(cfg=config.elasticsearch)
+        return ElasticsearchCountApi(self.api_session)
+
     def loaded(self):
         wait(lambda: self.is_element_present('query_hits_label'), waiting_for='query_hits_label to be visible')
 
@@ -49,16 +65,57 @@ class DiscoverPage(KibanaBasePage):
         return locale.atoi(hits)
 
     def get_available_fields(self):
-        fields = []
-        for elem in self.sidebar_item_fields:
-            fields.append(elem.text)
-        return fields
+        return [elem.text for elem in self.read_elements('.sidebar-item')]
 
-    def get_hits(self, pattern):
-        self.open()
-        self.wait_for_loading_indicator()
-        self.click_pattern(pattern)
+    def open_pattern(self, pattern_id=None, time_range=None):
+        '''
+        Open Discover, on the pattern with pattern_id and in the absolute time_range (from, to) if given
+        '''
+        params = []
+        if time_range:
+            params.append("_g=(time:(from:'%s',mode:absolute,to:'%s'))" % time_range)
+        if pattern_id:
+            params.append("_a=(index:'%s')" % pattern_id)
+        self._driver.get(self.url + ('?' + '&'.join(params) if params else ''))
+
+    def pinned_time_range(self):
+        '''
+        Default time range as absolute (from, to) timestamps, the page and _count then cover the same documents
+        '''
+        now = datetime.datetime.utcnow()
+        return tuple([moment.strftime('%Y-%m-%dT%H:%M:%S.') + '%03dZ' % (moment.microsecond // 1000)
+                      for moment in [now - self.DEFAULT_TIME_RANGE, now]])
+
+    def get_hits(self, pattern, time_field=None, mode=None, timeout=30, pattern_id=None):
+        '''
+        Number of hits shown for pattern, mode defaults to config.testing.discover_hits:
+            ui: open the page, select the pattern and read the hits label once it is above zero
+            hybrid: get the expected number with _count, then read the label as soon as it shows that number
+            api: only the _count, the page is not opened
+        time_field: time based patterns only count documents in the default time range, pinned to absolute
+                    timestamps for both the page and _count. Documents indexed late into the range can still
+                    show up on the page, so hybrid accepts at least the _count for them.
+        pattern_id: open Discover on the pattern with this id instead of selecting pattern by its title
+        Raises TimeoutError if hybrid does not see the expected number within timeout seconds.
+        '''
+        mode = mode or config.testing.discover_hits
+        time_range = self.pinned_time_range() if time_field else None
+        if mode in [self.HITS_HYBRID, self.HITS_API]:
+            expected = self.count_api.count(pattern, time_field, *(time_range or [None]))
+            if mode == self.HITS_API:
+                return expected
+        self.open_pattern(pattern_id, time_range)
+        if mode == self.HITS_HYBRID:
+            if not pattern_id:
+                self.click_pattern(pattern)
+            if not self.wait_for_number(self.query_hits_label_selector, expected, timeout, at_least=bool(time_field)):
+                raise TimeoutError('Discover hits for %s did not reach %d within %ds, shown: %s' %
+                                   (pattern, expected, timeout, self.query_hits_label.text))
+            return self.get_query_hits()
         self.wait_for_loading_indicator()
+        if not pattern_id:
+            self.click_pattern(pattern)
+            self.wait_for_loading_indicator()
         try:
             wait(lambda: int(self.get_query_hits()) > 0, timeout_seconds=7)
         except:
@@ -66,15 +123,10 @@ class DiscoverPage(KibanaBasePage):
         return int(self.get_query_hits())
 
 
-class IndexPatternOptions(WebElement):
-    patterns = Finds(by=By.CSS_SELECTOR, value='div[role="option"]')
-
-
 class IndexPatternSideList(KibanaBasePage):
 
     index_pattern_link = Find(by=By.CLASS_NAME, value='index-pattern')
     index_pattern_dropdown = Find(by=By.CLASS_NAME, value='index-pattern-selection')
-    index_pattern_dropdown_options = Find(IndexPatternOptions, by=By.CLASS_NAME, value='index-pattern-selection')
     index_pattern_field = Find(by=By.CLASS_NAME, value='ui-select-search')
 
     def __init__(self, **kwargs):
@@ -89,10 +141,10 @@ class IndexPatternSideList(KibanaBasePage):
                 return
         elif self.is_element_present('index_pattern_dropdown'):
             self.index_pattern_dropdown.click()
-            for elem in self.index_pattern_dropdown_options.patterns:
-                if elem.text == pattern:
+            for option in self.read_elements('div[role="option"]', context=self.index_pattern_dropdown):
+                if option.text == pattern:
                     try:
-                        elem.click()
+                        option.element.click()
                     except:
                         if self.is_element_present('index_pattern_field'):
                             self.index_pattern_field.clear()
@@ -5,9 +5,12 @@ Created on Sep 23, 2017
 '''
 
 
+import time
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 from webium import BasePage, Find
 from webium.wait import wait
+from munch import Munch
 from lib import config
 
 def data_test_subj(elem_names):
@@ -19,16 +22,169 @@ def data_test_subj(elem_names):
 class KibanaBasePage(BasePage):
 
     loading_indicator = Find(**data_test_subj('globalLoadingIndicator'))
+    loading_indicator_selector = data_test_subj('globalLoadingIndicator')['value']
+
+    # Callables receiving a sample dict for every wait: page, wait, duration (seconds) and done
+    # (False if it timed out)
+    _wait_hooks = []
+
+    # Resolves once the page is idle: the loading indicator is hidden, no XHR/fetch request is pending and
+    # the DOM has not changed for quiet milliseconds. Requests are counted by wrapping XHR and fetch the first
+    # time the script runs on a page, DOM changes restart the quiet period through a MutationObserver.
+    # Calls back with false after timeout milliseconds (see run_wait), observer and timers are stopped either way.
+    _wait_for_idle_script = '''
+        var selector = arguments[0], quiet = arguments[1];
+        var timeout = arguments[arguments.length - 2], done = arguments[arguments.length - 1];
+        if (!window.__aitRequests) {
+            var requests = window.__aitRequests = {pending: 0};
+            var send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function () {
+                requests.pending++;
+                this.addEventListener('loadend', function () { requests.pending--; });
+                return send.apply(this, arguments);
+            };
+            if (window.fetch) {
+                var fetch = window.fetch;
+                window.fetch = function () {
+                    requests.pending++;
+                    return fetch.apply(this, arguments).then(
+                        function (response) { requests.pending--; return response; },
+                        function (error) { requests.pending--; throw error; });
+                };
+            }
+        }
+        function busy() {
+            var elem = document.querySelector(selector);
+            return (elem !== null && elem.offsetParent !== null) || window.__aitRequests.pending > 0;
+        }
+        var timer = null;
+        var observer = new MutationObserver(check);
+        var expiry = setTimeout(function () { finish(false); }, timeout);
+        function finish(result) {
+            observer.disconnect();
+            clearTimeout(timer);
+            clearTimeout(expiry);
+            done(result);
+        }
+        function check() {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                if (busy()) {
+                    check();
+                } else {
+                    finish(true);
+                }
+            }, quiet);
+        }
+        observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+        check();
+    '''
+
+    # Resolves as soon as the element text, read as a number, equals the expected one (or is at least that).
+    # Re-checked on every DOM mutation instead of polling from the test side, calls back with false after
+    # timeout milliseconds.
+    _wait_for_number_script = '''
+        var selector = arguments[0], expected = arguments[1], atLeast = arguments[2];
+        var timeout = arguments[arguments.length - 2], done = arguments[arguments.length - 1];
+        function matches() {
+            var elem = document.querySelector(selector);
+            if (elem === null) { return false; }
+            var number = parseInt(elem.textContent.replace(/[^0-9]/g, ''), 10);
+            return atLeast ? number >= expected : number === expected;
+        }
+        if (matches()) { done(true); return; }
+        var observer = new MutationObserver(function () {
+            if (matches()) { finish(true); }
+        });
+        var expiry = setTimeout(function () { finish(false); }, timeout);
+        function finish(result) {
+            observer.disconnect();
+            clearTimeout(expiry);
+            done(result);
+        }
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    '''
+
+    # Element, text, visibility and requested attributes of every element matching a selector, in one round trip
+    _read_elements_script = '''
+        var elems = (arguments[2] || document).querySelectorAll(arguments[0]), names = arguments[1], result = [];
+        for (var i = 0; i < elems.length; i++) {
+            var elem = elems[i], rect = elem.getBoundingClientRect(), style = window.getComputedStyle(elem);
+            var attributes = {};
+            for (var j = 0; j < names.length; j++) {
+                attributes[names[j]] = elem.getAttribute(names[j]);
+            }
+            result.push({element: elem,
+                         text: (elem.innerText || '').trim(),
+                         visible: rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden',
+                         attributes: attributes});
+        }
+        return result;
+    '''
 
     def __init__(self, url=config.kibana.url, **kwargs):
         self.url = url.strip('/')
         super().__init__(**kwargs)
 
     def wait_for_loading_indicator(self, timeout=5):
+        if not self.wait_until_idle(timeout):
+            wait(lambda: self.is_element_present('loading_indicator') is False,
+                 waiting_for='Loading indicator is not displayed', timeout_seconds=timeout)
+
+    def wait_until_idle(self, timeout=30, quiet_ms=250):
+        '''
+        Wait until Kibana is idle (see _wait_for_idle_script), returns False if it is not within timeout seconds
+        '''
+        return self.run_wait('idle', timeout, self._wait_for_idle_script, self.loading_indicator_selector,
+                             quiet_ms)
+
+    def run_wait(self, name, timeout, script, *args):
+        '''
+        Block on an async wait script that calls back with true once its condition holds.
+        The script gets timeout in milliseconds as its last argument before the callback and calls back with
+        false itself when it expires, so it stops its observers and timers. Selenium's script timeout is a
+        little longer and only a fallback.
+        The time taken is reported to the wait hooks, returns False if the script did not finish in time.
+        '''
+        start = time.monotonic()
+        self._driver.set_script_timeout(timeout + 5)
         try:
-            wait(lambda: self.is_element_present('loading_indicator') is True,
-                 waiting_for='Loading indicator is displayed', timeout_seconds=timeout)
-        except:
-            pass
-        wait(lambda: self.is_element_present('loading_indicator') is False,
-             waiting_for='Loading indicator is not displayed', timeout_seconds=timeout)
+            done = self._driver.execute_async_script(script, *(args + (int(timeout * 1000),))) is True
+        except TimeoutException:
+            done = False
+        self.record_wait(name, time.monotonic() - start, done)
+        return done
+
+    @classmethod
+    def add_wait_hook(cls, hook):
+        cls._wait_hooks.append(hook)
+
+    @classmethod
+    def remove_wait_hook(cls, hook):
+        if hook in cls._wait_hooks:
+            cls._wait_hooks.remove(hook)
+
+    def record_wait(self, name, duration, done):
+        sample = {'page': self.__class__.__name__, 'wait': name, 'duration': duration, 'done': done}
+        for hook in list(self._wait_hooks):
+            hook(sample)
+
+    def read_elements(self, css_selector, attributes=None, context=None):
+        '''
+        Read every element matching css_selector (within context element if given) with a single script call
+        instead of a round trip per element and property. Returns a list of Munch:
+        element (WebElement, for clicking), text, visible and attributes (name -> value for attributes)
+        '''
+        elems = self._driver.execute_script(self._read_elements_script, css_selector, list(attributes or []),
+                                            context)
+        return [Munch(elem) for elem in elems]
+
+    def read_test_subj(self, elem_names, attributes=None, context=None):
+        return self.read_elements(data_test_subj(elem_names)['value'], attributes, context)
+
+    def wait_for_number(self, css_selector, number, timeout=30, at_least=False):
+        '''
+        Wait until the element text shows number (or more with at_least), returns False if it does not within
+        timeout seconds
+        '''
+        return self.run_wait('number', timeout, self._wait_for_number_script, css_selector, number, at_least)
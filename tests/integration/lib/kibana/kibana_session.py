@@ -0,0 +1,134 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import os
+import json
+import time
+import requests
+from requests.packages.urllib3 import disable_warnings
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from lib import config
+
+
+class KibanaSession:
+    '''
+    Authenticated Kibana session shared by every browser of a test run
+
+    The session cookie is obtained once through the security login api (or captured from a browser after
+    a UI login), cached in cookie_file until it expires and added to new webdrivers, so they start logged in
+    without going through the login page. A cached cookie is checked against the api before it is reused.
+    Cookies without an expiry are kept for ttl seconds.
+    '''
+
+    login_path = '/api/security/v1/login'
+    me_path = '/api/security/v1/me'
+
+    def __init__(self, url=config.kibana.url, username=None, password=None, cookie_file=None, ttl=None):
+        self.url = url.strip('/')
+        self.username = username or config.elasticsearch.username
+        self.password = password or config.elasticsearch.password
+        self.cookie_file = cookie_file or config.kibana.cookie_file
+        self.ttl = int(ttl or config.kibana.session_ttl)
+        disable_warnings(InsecureRequestWarning)
+
+    def cookies(self):
+        '''
+        Valid session cookies from the cache or a new api login, None if neither works
+        '''
+        cookies = self.load()
+        if cookies and self.is_valid(cookies):
+            return cookies
+        return self.login()
+
+    def login(self):
+        try:
+            response = requests.post(self.url + self.login_path, verify=False, timeout=60,
+                                     headers={'kbn-xsrf': 'true'},
+                                     json={'username': self.username, 'password': self.password})
+        except requests.RequestException as e:
+            print('Unable to login to Kibana api: ' + str(e))
+            return None
+        if response.status_code not in [200, 204] or not response.cookies:
+            print('Unable to login to Kibana api, status: %d' % response.status_code)
+            return None
+        default_expiry = int(time.time()) + self.ttl
+        cookies = [{'name': cookie.name,
+                    'value': cookie.value,
+                    'path': cookie.path or '/',
+                    'secure': bool(cookie.secure),
+                    'expiry': int(cookie.expires or default_expiry)} for cookie in response.cookies]
+        self.save(cookies)
+        return cookies
+
+    def is_valid(self, cookies):
+        try:
+            response = requests.get(self.url + self.me_path, verify=False, timeout=60,
+                                    cookies=dict((cookie['name'], cookie['value']) for cookie in cookies))
+        except requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def capture(self, driver):
+        '''
+        Cache the cookies of a browser that logged in through the UI
+        '''
+        default_expiry = int(time.time()) + self.ttl
+        cookies = []
+        for cookie in driver.get_cookies():
+            cookie = dict((key, cookie[key]) for key in ['name', 'value', 'path', 'secure', 'expiry'] if key in cookie)
+            cookie.setdefault('expiry', default_expiry)
+            cookies.append(cookie)
+        if cookies:
+            self.save(cookies)
+        return cookies
+
+    def inject(self, driver, cookies=None):
+        '''
+        Add the session cookies to driver, returns False if there is no valid session to add
+        '''
+        cookies = cookies or self.cookies()
+        if not cookies:
+            return False
+        # Cookies can only be set for the domain of the current page, load a small one first
+        driver.get(self.url + '/api/status')
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+        return True
+
+    def driver_class(self, driver_class):
+        '''
+        Wrap a webdriver class so every driver it creates starts with the session cookies
+        '''
+        def create_driver():
+            driver = driver_class()
+            self.inject(driver)
+            return driver
+        return create_driver
+
+    def load(self):
+        if not os.path.isfile(self.cookie_file):
+            return None
+        try:
+            with open(self.cookie_file) as f:
+                cookies = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not cookies or min([cookie.get('expiry', 0) for cookie in cookies]) <= time.time() + 60:
+            return None
+        return cookies
+
+    def save(self, cookies):
+        tmpfile = self.cookie_file + '.' + str(os.getpid())
+        try:
+            with open(tmpfile, 'w') as f:
+                json.dump(cookies, f)
+            os.chmod(tmpfile, 0o600)
+            os.replace(tmpfile, self.cookie_file)
+        except OSError:
+            print('Warning! Unable to write Kibana cookie file: ' + self.cookie_file)
+
+    def clear(self):
+        if os.path.isfile(self.cookie_file):
+            os.remove(self.cookie_file)
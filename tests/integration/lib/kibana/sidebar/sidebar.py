@@ -6,10 +6,9 @@ Created on Jan 16, 2017
 
 
 import re
-from lib.kibana.kibana_basepage import KibanaBasePage, data_test_subj
-from webium import Finds, Find
+from lib.kibana.kibana_basepage import KibanaBasePage
+from webium import Find
 from webium.wait import wait
-from webium.controls.link import Link
 from webium.driver import get_driver
 from lib.ait_exceptions import IndexPatternDoesNotExist
 from selenium.webdriver.common.by import By
@@ -34,7 +33,6 @@ class Sidebar(KibanaBasePage):
     LOGOUT = 'Logout'
 
     sidebar_main = Find(by=By.CLASS_NAME, value='global-nav__links')
-    sidebar_links = Finds(Link, **data_test_subj('global-nav-link appLink'))
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -43,9 +41,9 @@ class Sidebar(KibanaBasePage):
         wait(lambda: self.is_element_present('sidebar_main') is True)
 
     def click_link_text(self, text):
-        for link in self.sidebar_links:
+        for link in self.read_test_subj('global-nav-link appLink'):
             if link.text == text:
-                link.click()
+                link.element.click()
                 break
 
     def is_link_visible(self, text):
@@ -0,0 +1,113 @@
+'''
+Created on Oct 18, 2026
+'''
+
+
+import csv
+import json
+import math
+import threading
+import pytest
+from lib.api_session import ApiSession
+from lib.kibana.kibana_basepage import KibanaBasePage
+
+
+def percentile(values, pct):
+    '''
+    Nearest rank percentile of a non empty list
+    '''
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class TimingReport:
+    '''
+    pytest plugin collecting the latency of every ApiSession request, the duration of every page wait and
+    of every test phase. Page waits are reported like requests with method WAIT and endpoint <page>.<wait>,
+    waits that timed out count as errors.
+
+    Samples are tagged with the test running when they were made ('session' outside of tests, e.g. session
+    fixtures). At the end of the session <basename>.json and <basename>.csv are written with count, p50, p95,
+    max and bytes per endpoint, the json also holds the per test breakdown and test phase durations.
+    '''
+
+    def __init__(self, basename):
+        self.basename = basename
+        self.samples = []
+        self.durations = []
+        self.current_test = 'session'
+        self._lock = threading.Lock()
+        ApiSession.add_request_hook(self.record)
+        KibanaBasePage.add_wait_hook(self.record_wait)
+
+    def record_wait(self, sample):
+        self.record({'method': 'WAIT',
+                     'endpoint': sample['page'] + '.' + sample['wait'],
+                     'status': 200 if sample['done'] else None,
+                     'bytes_sent': 0,
+                     'bytes_received': 0,
+                     'latency': sample['duration']})
+
+    def record(self, sample):
+        sample = dict(sample, test=self.current_test)
+        with self._lock:
+            self.samples.append(sample)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.current_test = item.nodeid
+        yield
+        self.current_test = 'session'
+
+    def pytest_runtest_logreport(self, report):
+        self.durations.append({'test': report.nodeid, 'phase': report.when,
+                               'outcome': report.outcome, 'duration': report.duration})
+
+    def pytest_sessionfinish(self, session):
+        ApiSession.remove_request_hook(self.record)
+        KibanaBasePage.remove_wait_hook(self.record_wait)
+        endpoints = self.summarize(self.samples)
+        tests = {}
+        for sample in self.samples:
+            tests.setdefault(sample['test'], []).append(sample)
+        report = {'endpoints': endpoints,
+                  'tests': dict((test, self.summarize(samples)) for test, samples in tests.items()),
+                  'durations': self.durations}
+        try:
+            with open(self.basename + '.json', 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            with open(self.basename + '.csv', 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['method', 'endpoint', 'count', 'errors', 'p50', 'p95', 'max',
+                                 'bytes_sent', 'bytes_received'])
+                for row in endpoints:
+                    writer.writerow([row['method'], row['endpoint'], row['count'], row['errors'],
+                                     '%.4f' % row['p50'], '%.4f' % row['p95'], '%.4f' % row['max'],
+                                     row['bytes_sent'], row['bytes_received']])
+        except OSError as e:
+            print('Warning! Unable to write timing report: ' + str(e))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.samples:
+            terminalreporter.write_line('timing report: %s.json, %s.csv (%d requests)' %
+                                        (self.basename, self.basename, len(self.samples)))
+
+    @staticmethod
+    def summarize(samples):
+        groups = {}
+        for sample in samples:
+            groups.setdefault((sample['method'], sample['endpoint']), []).append(sample)
+        rows = []
+        for (method, endpoint), group in sorted(groups.items()):
+            latencies = [sample['latency'] for sample in group]
+            rows.append({'method': method,
+                         'endpoint': endpoint,
+                         'count': len(group),
+                         'errors': len([s for s in group if s['status'] is None or s['status'] >= 400]),
+                         'p50': percentile(latencies, 50),
+                         'p95': percentile(latencies, 95),
+                         'max': max(latencies),
+                         'bytes_sent': sum([sample['bytes_sent'] for sample in group]),
+                         'bytes_received': sum([sample['bytes_received'] for sample in group])})
+        return rows
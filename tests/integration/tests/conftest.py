@@ -6,40 +6,88 @@ Created on Oct 3, 2017
 
 
 import pytest
-from webium.driver import close_driver
+from webium import settings
+from webium.driver import close_driver, get_driver
 from lib.api_session import ApiSession
-from lib import config
+from lib import config as lib_config
 from webium.wait import wait
 from lib.kibana.login.login_page import LoginPage
+from lib.kibana.kibana_session import KibanaSession
 from lib.kibana.sidebar.sidebar import Sidebar
 from xvfbwrapper import Xvfb
+from lib.timing_report import TimingReport
+from lib.kibana.api.index_pattern_api import KibanaIndexPatternApi
+from munch import Munch
 import time
 
+def get_worker_id(pytest_config):
+    # pytest-xdist worker id (gw0, gw1, ...), 'master' when not running in parallel
+    workerinput = getattr(pytest_config, 'workerinput', None) or getattr(pytest_config, 'slaveinput', None)
+    return workerinput['workerid'] if workerinput else 'master'
+
+def pytest_configure(config):
+    # The hook argument has to be named config, the ait settings are imported as lib_config.
+    # With xdist only the workers run tests, each writes its own report and the master none
+    worker_id = get_worker_id(config)
+    if worker_id == 'master' and getattr(config.option, 'dist', 'no') != 'no':
+        return
+    basename = lib_config.testing.timing_report
+    if worker_id != 'master':
+        basename += '_' + worker_id
+    config.pluginmanager.register(TimingReport(basename), 'timing_report')
+
+@pytest.fixture(scope='session', autouse=False)
+def worker_id(request):
+    return get_worker_id(request.config)
+
 @pytest.fixture(scope='session', autouse=False)
 def xvfb_launcher(request):
-    if config.browser.headless:
+    # Each worker process starts its own display, Xvfb locks a free display number and sets DISPLAY
+    # for the process, so the worker's browser is started on it
+    if lib_config.browser.headless:
         vdisplay = Xvfb()
         vdisplay.start()
         return vdisplay
 
 @pytest.fixture(scope='session', autouse=False)
 def es_api_session(request):
-    api = ApiSession(cfg=config.elasticsearch)
+    api = ApiSession(cfg=lib_config.elasticsearch)
     return api
 
+@pytest.fixture(scope='session', autouse=False)
+def kibana_api_session(request):
+    cfg = Munch(lib_config.kibana)
+    cfg.username = lib_config.elasticsearch.username
+    cfg.password = lib_config.elasticsearch.password
+    api = ApiSession(cfg=cfg)
+    return api
+
+@pytest.fixture(scope='session', autouse=False)
+def kibana_index_pattern_api(request, kibana_api_session, worker_id):
+    # Index pattern ids are prefixed per worker so parallel workers do not collide in Kibana
+    return KibanaIndexPatternApi(kibana_api_session, namespace='ait-' + worker_id)
+
 @pytest.fixture(scope='session', autouse=False)
 def kibana_login_as_elastic_user(request):
-    if config.testing.xpack:
-        login_page = LoginPage()
-        login_page.login(config.elasticsearch.username, config.elasticsearch.password)
+    if lib_config.testing.xpack:
+        # New browsers get the cached session cookie, only log in through the UI if there is none
+        session = KibanaSession()
+        settings.driver_class = session.driver_class(lib_config.browser.type)
         sidebar = Sidebar()
+        sidebar.open()
+        login_page = LoginPage()
+        # Wait for whichever shows first, the sidebar when the session cookie is valid, else the login form
+        wait(lambda: sidebar.is_element_present('sidebar_main') or login_page.is_element_present('username_field'))
+        if not sidebar.is_element_present('sidebar_main'):
+            login_page.login(lib_config.elasticsearch.username, lib_config.elasticsearch.password)
         sidebar.loaded()
-        wait(lambda: sidebar.is_link_visible(config.elasticsearch.username) is True)
+        wait(lambda: sidebar.is_link_visible(lib_config.elasticsearch.username) is True)
+        session.capture(get_driver())
 
 @pytest.fixture(scope='session', autouse=True)
 def teardown(request, xvfb_launcher):
     @request.addfinalizer
     def tear_down():
         close_driver()
-        if config.browser.headless:
+        if lib_config.browser.headless:
             xvfb_launcher.stop()
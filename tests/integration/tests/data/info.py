@@ -5,6 +5,7 @@ Created on Oct 9, 2017
 '''
 
 
+import os
 from munch import Munch
 
 es_bank_accounts = Munch()
@@ -12,3 +13,12 @@ es_bank_accounts.file = 'data/accounts.json'
 es_bank_accounts.index = 'bank'
 es_bank_accounts.type = 'account'
 es_bank_accounts.entries = 1000
+
+# Generated with lib.elasticsearch.data_generator.BulkDataGenerator, opt-in: set AIT_GENERATED_DOCS to the size
+# The index must stay outside the bank* pattern, it would add to the bank hits
+es_generated_accounts = Munch()
+es_generated_accounts.kind = 'accounts'
+es_generated_accounts.index = 'generated_accounts'
+es_generated_accounts.type = 'account'
+es_generated_accounts.seed = 1
+es_generated_accounts.entries = int(os.getenv('AIT_GENERATED_DOCS') or 0)
@@ -8,6 +8,8 @@ Created on Jan 29, 2018
 import pytest
 from tests.data import info
 from lib.elasticsearch.api.bulk_api import ElasticsearchBulkApi
+from lib.elasticsearch.api.count_api import ElasticsearchCountApi
+from lib.elasticsearch.data_generator import BulkDataGenerator
 from lib.kibana.discover.discover_page import DiscoverPage
 from lib.kibana.management.index_patterns_page import IndexPatternsPage
 
@@ -20,8 +22,16 @@ class TestBasicIntegration:
                 pytest.mark.metricbeat('metricbeat-*'),
                 pytest.mark.logstash('logstash-*')]
 
+    time_based_patterns = ['filebeat-*', 'packetbeat-*', 'metricbeat-*', 'logstash-*']
+
+    @pytest.fixture(scope='class')
+    def time_based_index_patterns(self, kibana_index_pattern_api):
+        """Create all time based index patterns in one request"""
+        patterns = [(pattern, IndexPatternsPage.TIME_FILTER_TIMESTAMP) for pattern in self.time_based_patterns]
+        return dict(zip(self.time_based_patterns, kibana_index_pattern_api.create_many(patterns)))
+
     @pytest.mark.kibana
-    def test_discover_page_hits_equals_num_entries(self, es_api_session):
+    def test_discover_page_hits_equals_num_entries(self, es_api_session, kibana_index_pattern_api):
         """Verify number of hits is equal to number of entries in bank.json posted in kibana discover page"""
         data = info.es_bank_accounts
         kibana_index = data.index + '*'
@@ -29,18 +39,32 @@ class TestBasicIntegration:
         response = esapi.post(file=data.file,
                               index=data.index,
                               doc_type=data.type)
-        index_patterns_page = IndexPatternsPage()
-        index_patterns_page.create_index(kibana_index, IndexPatternsPage.TIME_FILTER_NOT_APPLICABLE)
-        discover_page = DiscoverPage()
-        hits = discover_page.get_hits(kibana_index)
+        pattern_id = kibana_index_pattern_api.create(kibana_index, IndexPatternsPage.TIME_FILTER_NOT_APPLICABLE)
+        discover_page = DiscoverPage(api_session=es_api_session)
+        hits = discover_page.get_hits(kibana_index, pattern_id=pattern_id)
+        assert hits == data.entries
+
+    @pytest.mark.kibana
+    @pytest.mark.skipif(not info.es_generated_accounts.entries, reason='AIT_GENERATED_DOCS is not set')
+    def test_discover_page_hits_equals_num_generated_entries(self, es_api_session, kibana_index_pattern_api):
+        """Verify number of hits is equal to number of generated entries (AIT_GENERATED_DOCS) in kibana discover page"""
+        data = info.es_generated_accounts
+        kibana_index = data.index
+        generator = BulkDataGenerator(data.kind, data.entries, seed=data.seed, index=data.index, doc_type=data.type)
+        esapi = ElasticsearchBulkApi(es_api_session)
+        summary = esapi.post_chunked(lines=generator, index=data.index)
+        assert summary.failed == 0
+        pattern_id = kibana_index_pattern_api.create(kibana_index, IndexPatternsPage.TIME_FILTER_NOT_APPLICABLE)
+        discover_page = DiscoverPage(api_session=es_api_session)
+        hits = discover_page.get_hits(kibana_index, pattern_id=pattern_id)
+        assert ElasticsearchCountApi(es_api_session).count(data.index) == data.entries
         assert hits == data.entries
 
     @pytest.mark.kibana
     @pytest.mark.parametrize("kibana_index", testdata)
-    def test_discover_page_hits_greater_than_zero(self, kibana_index):
+    def test_discover_page_hits_greater_than_zero(self, kibana_index, es_api_session, time_based_index_patterns):
        """Verify number of hits is great than zero in kibana discover page"""
-       index_patterns_page = IndexPatternsPage()
-       index_patterns_page.create_index(kibana_index, IndexPatternsPage.TIME_FILTER_TIMESTAMP)
-       discover_page = DiscoverPage()
-       hits = discover_page.get_hits(kibana_index)
+       discover_page = DiscoverPage(api_session=es_api_session)
+       hits = discover_page.get_hits(kibana_index, time_field=IndexPatternsPage.TIME_FILTER_TIMESTAMP,
+                                     pattern_id=time_based_index_patterns[kibana_index])
        assert hits > 0
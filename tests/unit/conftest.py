@@ -0,0 +1,109 @@
+'''
+Created on Oct 18, 2026
+
+Unit tests for the build scripts, ansible modules and integration test libraries, run from the repository root:
+    python -m pytest tests/unit
+'''
+
+import os
+import sys
+import json
+import types
+import threading
+import socketserver
+import pytest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for path in ['tests/integration', 'scripts/python', 'scripts/python/lib', 'ansible/library']:
+    sys.path.insert(0, os.path.join(ROOT, path))
+
+# The cloud client is a private package and vault is only used by the CloudCluster constructor, the cloud tests
+# need neither
+for name in ('hvac', 'cloud_sdk_py', 'cloud_sdk_py.client'):
+    try:
+        __import__(name)
+    except ImportError:
+        sys.modules[name] = types.ModuleType(name)
+if not hasattr(sys.modules['cloud_sdk_py.client'], 'Client'):
+    sys.modules['cloud_sdk_py.client'].Client = object
+
+
+class StubRequest:
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = StubRequest(self.command, self.path, dict(self.headers), self.rfile.read(length))
+        with self.server.lock:
+            self.server.requests.append(request)
+        result = self.server.respond(request)
+        status, body = result[:2]
+        headers = dict(result[2]) if len(result) > 2 else {}
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(socketserver.ThreadingMixIn, HTTPServer):
+    '''
+    HTTP server on a free local port, respond(request) returns (status, body) or (status, body, headers)
+    for every request, a dict or list body is sent as json. Requests are recorded in requests.
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, respond):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        self.respond = respond
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+
+@pytest.fixture
+def http_server():
+    '''
+    Start a StubServer with http_server(respond), servers are stopped after the test
+    '''
+    servers = []
+
+    def start(respond):
+        server = StubServer(respond)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,90 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import os
+import time
+import threading
+from ait_log_watch import LogFollower, line_time, watch
+
+
+def log_line(seconds_ago, text):
+    return time.strftime('[%Y-%m-%dT%H:%M:%S,000]', time.localtime(time.time() - seconds_ago)) + ' ' + text + '\n'
+
+
+def later(delay, action):
+    thread = threading.Timer(delay, action)
+    thread.start()
+    return thread
+
+
+def test_line_time():
+    local = time.mktime(time.strptime('2018-01-29 10:00:00', '%Y-%m-%d %H:%M:%S'))
+    assert line_time('[2018-01-29T10:00:00,123][INFO ][o.e.n.Node] started') == local
+    assert line_time('{"@timestamp":"2018-01-29T10:00:00Z","message":"Server running"}') == 1517220000
+    assert line_time('2018-01-29 12:00:00+02:00 started') == 1517220000
+    assert line_time('no timestamp') is None
+
+
+def test_new_lines_match(tmpdir):
+    log = tmpdir.join('product.log')
+    log.write(log_line(0, 'starting'))
+    follower = LogFollower('product', str(log), 'started', time.time(), lookback=60)
+    assert not follower.poll()
+    log.write(log_line(0, 'Node started'), mode='a')
+    assert follower.poll()
+    assert follower.line.endswith('Node started')
+
+
+def test_lines_logged_within_lookback_match(tmpdir):
+    log = tmpdir.join('product.log')
+    log.write(log_line(600, 'Node started') + log_line(10, 'Node started') + 'continued line\n')
+    follower = LogFollower('product', str(log), 'started', time.time(), lookback=60)
+    assert follower.poll()
+    assert follower.line == log_line(10, 'Node started').rstrip('\n')
+
+
+def test_lines_of_a_previous_run_do_not_match(tmpdir):
+    log = tmpdir.join('product.log')
+    log.write(log_line(600, 'Node started') + 'Node started without timestamp\n')
+    assert not LogFollower('product', str(log), 'started', time.time(), lookback=60).poll()
+    # Without lookback only new lines count
+    log.write(log_line(0, 'Node started'), mode='a')
+    start = time.time()
+    assert not LogFollower('product', str(log), 'started', start).poll()
+
+
+def test_rotated_and_truncated_files_are_read_from_the_start(tmpdir):
+    log = tmpdir.join('product.log')
+    log.write('x' * 100 + '\n')
+    follower = LogFollower('product', str(log), 'started', time.time())
+    rotated = tmpdir.join('product.log.new')
+    rotated.write('Node started\n')
+    os.rename(str(rotated), str(log))
+    assert follower.poll()
+
+    follower = LogFollower('product', str(log), 'stopped', time.time())
+    log.write('stopped\n')
+    assert follower.poll()
+
+
+def test_watch_waits_for_every_log(tmpdir):
+    first = tmpdir.join('first.log')
+    second = tmpdir.join('logs', 'second.log')
+    followers = [LogFollower(path.basename, str(path), 'started', time.time()) for path in [first, second]]
+    timers = [later(0.2, lambda: first.write('started\n')),
+              later(0.4, lambda: second.write('started\n', ensure=True))]
+    assert watch(followers, 10, 0.1) == []
+    assert [follower.ready_after is not None for follower in followers] == [True, True]
+    for timer in timers:
+        timer.join()
+
+
+def test_watch_returns_pending_logs_on_timeout(tmpdir):
+    log = tmpdir.join('product.log')
+    follower = LogFollower('product', str(log), 'started', time.time())
+    later(0.1, lambda: log.write('starting\n')).join()
+    start = time.time()
+    assert watch([follower], 0.5, 0.1) == [follower]
+    assert time.time() - start < 3
+    assert follower.ready_after is None
@@ -0,0 +1,73 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import time
+import subprocess
+from ait_ready_probe import Probe, is_ready, wait_ready
+
+
+def probe(server, product_type, **product):
+    product = dict(product, type=product_type, host='127.0.0.1', port=server.server_address[1])
+    return Probe(product, 'yellow', time.time())
+
+
+def test_is_ready():
+    assert is_ready('elasticsearch', 200, '{"status": "yellow"}', 'yellow')
+    assert not is_ready('elasticsearch', 200, '{"status": "red"}', 'yellow')
+    assert not is_ready('elasticsearch', 200, '{"status": "yellow"}', 'green')
+    assert is_ready('kibana', 200, '{"status": {"overall": {"state": "green"}}}', 'yellow')
+    assert not is_ready('kibana', 200, '{"status": {"overall": {"state": "yellow"}}}', 'yellow')
+    assert not is_ready('kibana', 200, 'Kibana server is not ready yet', 'yellow')
+    assert not is_ready('logstash', 503, '', 'yellow')
+
+
+def test_elasticsearch_is_ready_once_red_turns_yellow(http_server):
+    statuses = ['red', 'red', 'yellow']
+    server = http_server(lambda request: (200, {'status': statuses.pop(0) if len(statuses) > 1 else statuses[0]}))
+    elasticsearch = probe(server, 'elasticsearch')
+    assert wait_ready([elasticsearch], 10, 0.1) == []
+    assert elasticsearch.attempts == 3
+    assert [request.path for request in server.requests] == \
+        ['/_cluster/health?wait_for_status=yellow&timeout=1s'] * 3
+
+
+def test_unauthorized_counts_as_ready(http_server):
+    server = http_server(lambda request: (401, {'error': 'security_exception'}))
+    kibana = probe(server, 'kibana', username='elastic', password='changeme')
+    assert wait_ready([kibana], 5, 0.1) == []
+    assert kibana.attempts == 1
+    assert server.requests[0].headers['Authorization'].startswith('Basic ')
+
+
+def test_https_falls_back_to_http(http_server):
+    server = http_server(lambda request: (200, {}))
+    logstash = probe(server, 'logstash')
+    assert logstash.schemes == ['https', 'http']
+    assert logstash.probe()
+    assert logstash.url == '%s/_node/stats' % server.url
+    # The scheme that answered is the only one tried afterwards
+    assert logstash.schemes == ['http']
+
+
+def test_products_are_probed_concurrently_until_timeout(http_server):
+    ready = http_server(lambda request: (200, {}))
+    unavailable = http_server(lambda request: (503, ''))
+    probes = [probe(ready, 'apm_server', scheme='http'), probe(unavailable, 'logstash', scheme='http')]
+    start = time.time()
+    pending = wait_ready(probes, 1, 0.2)
+    assert time.time() - start < 5
+    assert pending == [probes[1]]
+    assert probes[0].ready_after is not None
+    assert probes[1].error == '%s/_node/stats: status 503' % unavailable.url
+
+
+def test_beat_without_port_waits_for_its_executable():
+    sleeper = subprocess.Popen(['sleep', '30'])
+    try:
+        # Retried, the child may not have executed sleep yet
+        assert wait_ready([Probe({'type': 'beat', 'process': 'sleep'}, 'yellow', time.time())], 5, 0.1) == []
+        assert not Probe({'type': 'beat', 'process': 'slee'}, 'yellow', time.time()).probe()
+    finally:
+        sleeper.kill()
+        sleeper.wait()
@@ -0,0 +1,89 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import os
+import hashlib
+import pytest
+from artifact_cache import ArtifactCache
+
+
+def package_server(http_server, packages, ranges=True, checksums=None):
+    '''
+    Serve packages (path -> content) with range requests and <path>.sha512 files, checksums overrides them
+    '''
+    def respond(request):
+        if request.path.endswith('.sha512'):
+            path = request.path[:-len('.sha512')]
+            if path not in packages:
+                return 404, ''
+            digest = (checksums or {}).get(path) or hashlib.sha512(packages[path]).hexdigest()
+            return 200, '%s  %s\n' % (digest, os.path.basename(path))
+        if request.path not in packages:
+            return 404, ''
+        content = packages[request.path]
+        byte_range = request.headers.get('Range')
+        if ranges and byte_range:
+            start = int(byte_range.split('=')[1].rstrip('-'))
+            if start >= len(content):
+                return 416, ''
+            return 206, content[start:], {'Content-Range': 'bytes %d-%d/%d' % (start, len(content) - 1, len(content))}
+        return 200, content
+    return http_server(respond)
+
+
+def package_requests(server):
+    return [request for request in server.requests if not request.path.endswith('.sha512')]
+
+
+def test_fetch_caches_by_build_and_file_name(http_server, tmpdir):
+    server = package_server(http_server, {'/6.2.3-a605b2d5/downloads/kibana/kibana.tar.gz': b'kibana'})
+    cache = ArtifactCache(root=str(tmpdir))
+    url = server.url + '/6.2.3-a605b2d5/downloads/kibana/kibana.tar.gz'
+    path = cache.fetch(url)
+    assert open(path, 'rb').read() == b'kibana'
+    assert cache.fetch(url) == path
+    assert cache.get(url, '6.2.3-a605b2d5') == path
+    assert len(package_requests(server)) == 1
+    assert os.listdir(str(tmpdir.join('tmp'))) == []
+
+
+@pytest.mark.parametrize('ranges', [True, False])
+def test_fetch_resumes_a_partial_download(http_server, tmpdir, ranges):
+    content = os.urandom(100000)
+    server = package_server(http_server, {'/pkg.zip': content}, ranges=ranges)
+    cache = ArtifactCache(root=str(tmpdir))
+    url = server.url + '/pkg.zip'
+    partfile = tmpdir.join('tmp', hashlib.sha1(cache.key(url).encode()).hexdigest() + '.part')
+    partfile.write_binary(content[:30000])
+    path = cache.fetch(url)
+    assert open(path, 'rb').read() == content
+    assert os.path.basename(os.path.dirname(path)) == hashlib.sha512(content).hexdigest()
+    assert package_requests(server)[0].headers.get('Range') == 'bytes=30000-'
+    assert not partfile.exists()
+
+
+def test_fetch_discards_a_download_with_a_wrong_sha512(http_server, tmpdir):
+    server = package_server(http_server, {'/pkg.zip': b'package'}, checksums={'/pkg.zip': '0' * 128})
+    cache = ArtifactCache(root=str(tmpdir))
+    with pytest.raises(ValueError):
+        cache.fetch(server.url + '/pkg.zip')
+    assert cache.get(server.url + '/pkg.zip') is None
+    assert [name for name in os.listdir(str(tmpdir.join('tmp'))) if name.endswith('.part')] == []
+    assert os.listdir(str(tmpdir.join('objects'))) == []
+
+
+def test_least_recently_used_packages_are_evicted(http_server, tmpdir):
+    packages = dict(('/%s.zip' % name, name.encode() * 100) for name in ['a', 'b', 'c'])
+    server = package_server(http_server, packages)
+    cache = ArtifactCache(root=str(tmpdir), max_bytes=250)
+    url = lambda name: server.url + '/%s.zip' % name
+    cache.fetch(url('a'))
+    cache.fetch(url('b'))
+    # Using a makes b the least recently used
+    assert cache.get(url('a'))
+    cache.fetch(url('c'))
+    assert cache.get(url('b')) is None
+    assert cache.get(url('a')) and cache.get(url('c'))
+    assert cache.size() == 200
+    assert len(os.listdir(str(tmpdir.join('objects')))) == 2
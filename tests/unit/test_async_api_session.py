@@ -0,0 +1,67 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import time
+import threading
+import aiohttp
+from lib.async_api_session import AsyncApiSession
+
+
+class Concurrency:
+    '''
+    Counts requests in flight, the stub server handles each one in its own thread
+    '''
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.active -= 1
+
+
+def test_fan_out_returns_responses_in_call_order(http_server):
+    def respond(request):
+        # Later calls answer first
+        time.sleep(0.05 * (5 - int(request.path.split('/')[-1])))
+        return 200, {'path': request.path}
+
+    server = http_server(respond)
+    calls = ['/doc/%d' % i for i in range(5)]
+    responses = AsyncApiSession(url=server.url).fan_out_sync(calls)
+    assert [response.url.path for response in responses] == calls
+    assert [response.status for response in responses] == [200] * 5
+
+
+def test_fan_out_limits_concurrency(http_server):
+    concurrency = Concurrency()
+
+    def respond(request):
+        with concurrency:
+            time.sleep(0.1)
+        return 200, {}
+
+    server = http_server(respond)
+    AsyncApiSession(url=server.url).fan_out_sync(['/doc/%d' % i for i in range(10)], concurrency=3)
+    assert concurrency.max_active == 3
+    assert len(server.requests) == 10
+
+
+def test_fan_out_methods_and_exceptions(http_server):
+    server = http_server(lambda request: (404, {}) if request.path == '/missing' else (200, {}))
+    responses = AsyncApiSession(url=server.url).fan_out_sync(
+        ['/found', ('PUT', '/index'), ('POST', '/index/_doc', {'data': b'{"a": 1}'}), '/missing'],
+        return_exceptions=True)
+    assert [response.status for response in responses[:3]] == [200, 200, 200]
+    assert isinstance(responses[3], aiohttp.ClientResponseError)
+    assert responses[3].status == 404
+    assert sorted([(request.method, request.path, request.body) for request in server.requests]) == \
+        [('GET', '/found', b''), ('GET', '/missing', b''), ('POST', '/index/_doc', b'{"a": 1}'), ('PUT', '/index', b'')]
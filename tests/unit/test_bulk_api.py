@@ -0,0 +1,160 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import json
+import pytest
+from lib.api_session import ApiSession
+from lib.elasticsearch.api.bulk_api import ElasticsearchBulkApi
+
+
+def bulk_lines(count, index='test'):
+    lines = []
+    for i in range(count):
+        lines.append(json.dumps({'index': {'_index': index, '_id': str(i)}}) + '\n')
+        lines.append(json.dumps({'value': i}) + '\n')
+    return lines
+
+
+def bulk_items(body):
+    '''
+    Items of a bulk request body, as (action, source) with source None for a delete
+    '''
+    lines = iter(body.decode('utf-8').splitlines())
+    items = []
+    for action in lines:
+        action = json.loads(action)
+        source = None if 'delete' in action else json.loads(next(lines))
+        items.append((action, source))
+    return items
+
+
+def bulk_server(http_server, respond_item=None):
+    '''
+    Bulk endpoint answering every item with respond_item(action, source) -> status, 201 by default
+    '''
+    def respond(request):
+        if request.path.split('?')[0].endswith('/_refresh'):
+            return 200, {}
+        statuses = [(respond_item or (lambda action, source: 201))(action, source)
+                    for action, source in bulk_items(request.body)]
+        items = [{'index': {'status': status, 'error': {'type': 'rejected'} if status >= 300 else None}}
+                 for status in statuses]
+        return 200, {'errors': any(status >= 300 for status in statuses), 'items': items}
+    return http_server(respond)
+
+
+def bulk_api(url='http://127.0.0.1:1'):
+    return ElasticsearchBulkApi(ApiSession(url=url, retries=0))
+
+
+def test_chunks_are_limited_by_docs():
+    chunks = list(bulk_api().iter_chunks(bulk_lines(7), float('inf'), 3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert b''.join([b''.join(chunk) for chunk in chunks]) == ''.join(bulk_lines(7)).encode('utf-8')
+
+
+def test_chunks_are_limited_by_bytes():
+    item_size = len(''.join(bulk_lines(1)))
+    chunks = list(bulk_api().iter_chunks(bulk_lines(5), item_size * 2, float('inf')))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    # An item larger than chunk_bytes still gets a chunk of its own
+    chunks = list(bulk_api().iter_chunks(bulk_lines(2), 1, float('inf')))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+
+
+def test_chunks_keep_actions_with_their_source():
+    lines = [json.dumps({'delete': {'_id': '1'}}), '', json.dumps({'index': {'_id': '2'}}), json.dumps({'a': 1})]
+    chunks = list(bulk_api().iter_chunks(lines, float('inf'), 1))
+    assert chunks == [[b'{"delete": {"_id": "1"}}\n'], [b'{"index": {"_id": "2"}}\n{"a": 1}\n']]
+    with pytest.raises(ValueError):
+        list(bulk_api().iter_chunks([json.dumps({'index': {}})], float('inf'), 1))
+
+
+def test_post_chunked_sends_every_item_once_and_refreshes_at_the_end(http_server, tmpdir):
+    server = bulk_server(http_server)
+    bulk_file = tmpdir.join('bulk.json')
+    bulk_file.write(''.join(bulk_lines(25)))
+    summary = bulk_api(server.url).post_chunked(file=str(bulk_file), index='test', chunk_docs=10, workers=2)
+    assert summary.indexed == 25
+    assert summary.failed == 0
+    assert len(summary.latencies) == 3
+    bulk_requests = [request for request in server.requests if '/_bulk' in request.path]
+    assert sorted([len(bulk_items(request.body)) for request in bulk_requests]) == [5, 10, 10]
+    assert sorted([source['value'] for request in bulk_requests for _, source in bulk_items(request.body)]) == \
+        list(range(25))
+    assert all(['refresh' not in request.path for request in bulk_requests])
+    assert server.requests[-1].path == '/test/_refresh'
+
+
+def test_only_rejected_items_are_resent(http_server):
+    attempts = {}
+
+    def respond_item(action, source):
+        value = source['value']
+        attempts[value] = attempts.get(value, 0) + 1
+        if value == 3:
+            return 400
+        # Odd documents are rejected the first time
+        return 429 if value % 2 and attempts[value] == 1 else 201
+
+    server = bulk_server(http_server, respond_item)
+    api = bulk_api(server.url)
+    api.retry_backoff = 0
+    summary = api.post_chunked(lines=bulk_lines(10), chunk_docs=10)
+    assert summary.indexed == 9
+    assert summary.failed == 1
+    assert summary.errors == {'rejected': 1}
+    assert summary.retried == 4
+    bulk_requests = [request for request in server.requests if '/_bulk' in request.path]
+    assert [sorted([source['value'] for _, source in bulk_items(request.body)]) for request in bulk_requests] == \
+        [list(range(10)), [1, 5, 7, 9]]
+
+
+def test_items_still_rejected_after_max_retries_fail(http_server):
+    server = bulk_server(http_server, lambda action, source: 503 if source['value'] == 0 else 201)
+    api = bulk_api(server.url)
+    api.retry_backoff = 0
+    api.max_retries = 2
+    summary = api.post_chunked(lines=bulk_lines(3))
+    assert summary.indexed == 2
+    assert summary.failed == 1
+    assert summary.errors == {'retries_exhausted': 1}
+    assert summary.retried == 2
+    assert len([request for request in server.requests if '/_bulk' in request.path]) == 3
+
+
+def test_rejected_request_is_resent_whole(http_server):
+    rejected = []
+
+    def respond(request):
+        if '/_bulk' in request.path and not rejected:
+            rejected.append(request)
+            return 429, {'error': 'es_rejected_execution_exception'}
+        return 200, {'errors': False, 'items': []}
+
+    server = http_server(respond)
+    api = bulk_api(server.url)
+    api.retry_backoff = 0
+    summary = api.post_chunked(lines=bulk_lines(4))
+    assert summary.indexed == 4
+    assert summary.retried == 4
+    bulk_requests = [request for request in server.requests if '/_bulk' in request.path]
+    assert [request.body for request in bulk_requests] == [rejected[0].body] * 2
+
+
+def test_bulk_and_refresh_requests_have_no_session_timeout(http_server, monkeypatch):
+    server = bulk_server(http_server)
+    api = bulk_api(server.url)
+    timeouts = []
+    request = api.api.session.request
+
+    def record(method, url, **kwargs):
+        timeouts.append(kwargs.get('timeout'))
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(api.api.session, 'request', record)
+    api.post(data=''.join(bulk_lines(2)).encode('utf-8'), index='test')
+    api.post_chunked(lines=bulk_lines(2), index='test')
+    assert timeouts == [None, None, None]
+    assert ElasticsearchBulkApi(ApiSession(url=server.url), timeout=5).timeout == 5
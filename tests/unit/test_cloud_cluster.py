@@ -0,0 +1,122 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import time
+import threading
+import pytest
+
+from cloud_cluster import CloudCluster
+
+
+class StubClient:
+    '''
+    Cloud client that creates clusters after a short delay, records the plans, the most create calls in flight
+    at once and the clusters deleted. Creates fail from call fail_after on, set_monitoring fails monitoring_errors
+    times before it succeeds
+    '''
+
+    def __init__(self, delay=0.2, fail_after=None, monitoring_errors=0):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.monitoring_errors = monitoring_errors
+        self.monitoring_calls = 0
+        self.deleted = []
+        self.plans = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def create_cluster(self, plan):
+        with self.lock:
+            self.plans.append(plan)
+            if self.fail_after is not None and len(self.plans) > self.fail_after:
+                raise IOError('Create failed')
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return {'cluster_id': 'es-' + plan['cluster_name'], 'kibana_cluster_id': 'kb-' + plan['cluster_name']}
+
+    def get_cluster_info(self, cluster_id):
+        return {'plan_info': {'healthy': True},
+                'elasticsearch_monitoring_info': {'source_cluster_ids': [cluster_id] if self.monitoring_calls else []}}
+
+    def set_monitoring(self, cluster_id):
+        self.monitoring_calls += 1
+        if self.monitoring_calls <= self.monitoring_errors:
+            raise IOError('Monitoring not available yet')
+
+    def shutdown_cluster(self, cluster_id):
+        pass
+
+    def delete_cluster(self, cluster_id):
+        with self.lock:
+            self.deleted.append(cluster_id)
+
+
+def new_cluster(client, url, timeout=10, monitoring=False):
+    # Skip the constructor, it reads credentials and connects to cloud
+    cluster = CloudCluster.__new__(CloudCluster)
+    cluster.version = '6.2.3'
+    cluster.memory = 1024
+    cluster.region = 'us-east-1'
+    cluster.monitoring = monitoring
+    cluster.timeout = timeout
+    cluster.client = client
+    cluster.format_data = lambda data: dict(data, elasticsearch_url=url, kibana_url=url)
+    return cluster
+
+
+def test_create_many(http_server):
+    server = http_server(lambda request: (200, {}))
+    client = StubClient()
+    created = new_cluster(client, server.url).create_many(5, max_workers=2)
+    assert [data['cluster_id'] for data in created] == ['es-' + plan['cluster_name'] for plan in client.plans]
+    assert len(set([plan['cluster_name'] for plan in client.plans])) == 5
+    assert client.max_active == 2
+    paths = [request.path for request in server.requests]
+    assert paths.count('/') == 5
+    assert paths.count('/api/status') == 5
+
+
+def test_create_many_needs_a_cluster():
+    with pytest.raises(ValueError):
+        new_cluster(StubClient(), 'http://127.0.0.1:1').create_many(0)
+
+
+def test_create_many_fails_when_a_cluster_does_not_get_ready(http_server):
+    server = http_server(lambda request: (503, '') if request.path == '/api/status' else (200, {}))
+    client = StubClient(delay=0)
+    with pytest.raises(TimeoutError):
+        new_cluster(client, server.url, timeout=1).create_many(2)
+    assert sorted(client.deleted) == sorted(['es-' + plan['cluster_name'] for plan in client.plans])
+
+
+def test_create_many_deletes_created_clusters_when_a_create_fails():
+    client = StubClient(delay=0, fail_after=2)
+    with pytest.raises(IOError):
+        new_cluster(client, 'http://127.0.0.1:1').create_many(3, max_workers=1)
+    assert client.deleted == ['es-' + plan['cluster_name'] for plan in client.plans[:2]]
+
+
+def test_wait_for_cluster_retries_set_monitoring(http_server, monkeypatch):
+    monkeypatch.setattr('poll.time.sleep', lambda seconds: None)
+    server = http_server(lambda request: (200, {}))
+    client = StubClient(monitoring_errors=2)
+    durations = new_cluster(client, server.url, monitoring=True).wait_for_cluster(
+        {'cluster_id': 'es-1', 'elasticsearch_url': server.url, 'kibana_url': server.url})
+    assert 'monitoring_attached' in durations
+    assert client.monitoring_calls == 3
+
+
+def test_wait_for_existing_cluster_does_not_set_monitoring(http_server, monkeypatch):
+    monkeypatch.setattr('poll.time.sleep', lambda seconds: None)
+    server = http_server(lambda request: (200, {}))
+    client = StubClient()
+    cluster = new_cluster(client, server.url, timeout=1, monitoring=True)
+    cluster.monitoring_attached = lambda cluster_id: True
+    cluster.wait_for_cluster(
+        {'cluster_id': 'es-1', 'elasticsearch_url': server.url, 'kibana_url': server.url}, set_monitoring=False)
+    assert client.monitoring_calls == 0
@@ -0,0 +1,85 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import time
+import threading
+import pytest
+
+from cloud_pool import CloudClusterPool
+
+
+class StubCloud:
+    '''
+    CloudCluster that creates clusters after a short delay and counts them
+    '''
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def create_many(self, count):
+        time.sleep(self.delay)
+        with self.lock:
+            start = self.created
+            self.created += count
+        return [{'cluster_id': 'es-' + str(i), 'elasticsearch_url': 'http://127.0.0.1:1'}
+                for i in range(start, start + count)]
+
+
+def new_pool(tmpdir, cloud, monkeypatch):
+    monkeypatch.setenv('ESTF_CLOUD_VERSION', '6.2.3')
+    pool = CloudClusterPool(str(tmpdir.join('pool.db')))
+    pool._cloud = cloud
+    return pool
+
+
+def test_concurrent_fills_do_not_overshoot(tmpdir, monkeypatch):
+    cloud = StubCloud()
+    monkeypatch.setenv('ESTF_CLOUD_VERSION', '6.2.3')
+
+    def fill():
+        # One pool per thread like separate jobs, sqlite connections are not shared across threads
+        pool = CloudClusterPool(str(tmpdir.join('pool.db')))
+        pool._cloud = cloud
+        pool.fill(2)
+
+    threads = [threading.Thread(target=fill) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cloud.created == 2
+    statuses = new_pool(tmpdir, cloud, monkeypatch).status()
+    assert [state for cluster_id, state, leased_by in statuses] == ['ready', 'ready']
+
+
+def test_failed_fill_drops_its_reservation(tmpdir, monkeypatch):
+    cloud = StubCloud(delay=0)
+    pool = new_pool(tmpdir, cloud, monkeypatch)
+
+    def create_many(count):
+        raise IOError('Create failed')
+
+    monkeypatch.setattr(cloud, 'create_many', create_many)
+    with pytest.raises(IOError):
+        pool.fill(2)
+    assert pool.status() == []
+
+
+def test_wipe_uses_cluster_credentials(http_server, tmpdir, monkeypatch):
+    server = http_server(lambda request: (200, [{'index': 'logs'}, {'index': '.kibana'}])
+                         if request.method == 'GET' else (200, {}))
+    pool = new_pool(tmpdir, StubCloud(), monkeypatch)
+    pool.wipe({'cluster_id': 'es-0', 'elasticsearch_url': server.url, 'es_username': 'admin',
+               'es_password': 'secret'})
+    assert [(request.method, request.path) for request in server.requests] == \
+        [('GET', '/_cat/indices?format=json&h=index'), ('DELETE', '/logs')]
+    assert server.requests[0].headers['Authorization'] == 'Basic YWRtaW46c2VjcmV0'
+
+
+def test_wipe_needs_cluster_credentials(tmpdir, monkeypatch):
+    pool = new_pool(tmpdir, StubCloud(), monkeypatch)
+    with pytest.raises(ValueError):
+        pool.wipe({'cluster_id': 'es-0', 'elasticsearch_url': 'http://127.0.0.1:1'})
@@ -0,0 +1,68 @@
+'''
+Created on Oct 18, 2026
+'''
+
+from es_manifest import BuildManifest
+from es_build import ElasticStackBuild
+
+BUILD_ID = '6.2.3-a605b2d5'
+
+SUMMARY = '''<html><body>
+<a href="/{0}/downloads/elasticsearch/elasticsearch-6.2.3.tar.gz">elasticsearch</a>
+<a href="/{0}/downloads/kibana/kibana-6.2.3-linux-x86_64.tar.gz">kibana</a>
+<a href="/{0}/downloads/kibana/kibana-6.2.3-windows-x86.zip">kibana</a>
+<a href="/{0}/downloads/beats/filebeat/filebeat-6.2.3-linux-x86_64.tar.gz">filebeat</a>
+<a href="/{0}/downloads/beats/filebeat/filebeat-oss-6.2.3-linux-x86_64.tar.gz">filebeat oss</a>
+<a href="/{0}/summary-6.2.3.html">summary</a>
+</body></html>'''.format(BUILD_ID)
+
+
+def test_parse_indexes_packages_by_product_extension_and_architecture():
+    manifest = BuildManifest('6.2.3')
+    manifest.parse(SUMMARY, 'https://staging.elastic.co/%s/summary.html' % BUILD_ID)
+    downloads = 'https://staging.elastic.co/%s/downloads/' % BUILD_ID
+    assert manifest.index['elasticsearch/elasticsearch'] == {'tar.gz': {'': downloads + 'elasticsearch/elasticsearch-6.2.3.tar.gz'}}
+    assert manifest.index['kibana/kibana']['zip'] == {'windows-x86': downloads + 'kibana/kibana-6.2.3-windows-x86.zip'}
+    assert sorted(manifest.index) == ['beats/filebeat/filebeat', 'beats/filebeat/filebeat-oss',
+                                      'elasticsearch/elasticsearch', 'kibana/kibana']
+
+
+def test_parse_json_manifest():
+    manifest = BuildManifest('6.2.3')
+    manifest.parse('{"packages": {"kibana-6.2.3.deb": {"url": "https://staging.elastic.co/%s/downloads/kibana/'
+                   'kibana-6.2.3-amd64.deb"}}}' % BUILD_ID)
+    assert manifest.index == {'kibana/kibana': {'deb': {'amd64': 'https://staging.elastic.co/%s/downloads/kibana/'
+                                                                 'kibana-6.2.3-amd64.deb' % BUILD_ID}}}
+
+
+def test_lookup():
+    manifest = BuildManifest('6.2.3')
+    manifest.parse(SUMMARY, 'https://staging.elastic.co/%s/summary.html' % BUILD_ID)
+    url = 'https://staging.elastic.co/%s/downloads/kibana/kibana-6.2.3-linux-x86_64.tar.gz' % BUILD_ID
+    assert manifest.lookup(url) == url
+    assert manifest.lookup(url.replace('x86_64', 'x86')) == ''
+    assert manifest.lookup(url.replace('kibana-6.2.3', 'kibana-oss-6.2.3')) == ''
+    assert manifest.lookup('https://staging.elastic.co/%s/summary.html' % BUILD_ID) == ''
+
+
+def test_load_fails_on_error_status_and_unreachable_server(http_server):
+    server = http_server(lambda request: (404, 'not found'))
+    assert BuildManifest('6.2.3').load(server.url + '/summary.html') is False
+    server.shutdown()
+    server.server_close()
+    assert BuildManifest('6.2.3').load(server.url + '/summary.html') is False
+
+
+def test_resolve_from_manifest_makes_one_get_and_no_head(http_server, monkeypatch):
+    server = http_server(lambda request: (200, SUMMARY) if request.path.endswith('/summary.html') else (404, ''))
+    for name, value in {'ES_BUILD_SERVER': server.url, 'ES_BUILD_ID': BUILD_ID, 'ES_BUILD_PKG_EXT': 'tar.gz',
+                        'ES_BUILD_OSS': 'false', 'ES_BUILD_USE_MANIFEST': 'true'}.items():
+        monkeypatch.setenv(name, value)
+    urls = ElasticStackBuild(use_cache=False).resolve_all()
+    downloads = '%s/%s/downloads/' % (server.url, BUILD_ID)
+    assert urls['elasticsearch_package_url'] == downloads + 'elasticsearch/elasticsearch-6.2.3.tar.gz'
+    assert urls['kibana_package_url'] == downloads + 'kibana/kibana-6.2.3-linux-x86_64.tar.gz'
+    assert urls['filebeat_package_url'] == downloads + 'beats/filebeat/filebeat-6.2.3-linux-x86_64.tar.gz'
+    assert urls['logstash_package_url'] == ''
+    assert [(request.method, request.path) for request in server.requests] == \
+        [('GET', '/%s/summary.html' % BUILD_ID)]
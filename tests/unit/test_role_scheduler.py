@@ -0,0 +1,112 @@
+'''
+Created on Oct 18, 2026
+'''
+
+import time
+import threading
+import pytest
+import yaml
+from role_scheduler import RoleScheduler
+
+
+class StubScheduler(RoleScheduler):
+    '''
+    Scheduler that runs a role by sleeping for its duration instead of starting ansible-playbook, records
+    the order roles started in and the most roles running at once. Roles in fail exit with 2
+    '''
+
+    def __init__(self, playbook, durations=None, fail=(), **kwargs):
+        super().__init__(playbook, **kwargs)
+        self.durations = durations or {}
+        self.fail = fail
+        self.started = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def run_node(self, node, workdir):
+        with self.lock:
+            self.started.append(node.name)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        node.start = time.time()
+        time.sleep(self.durations.get(node.name, 0.05))
+        node.end = time.time()
+        with self.lock:
+            self.active -= 1
+        return 2 if node.name in self.fail else 0
+
+
+def write_playbook(tmpdir, roles):
+    playbook = tmpdir.join('playbook.yml')
+    playbook.write(yaml.safe_dump([{'hosts': 'all', 'roles': roles}]))
+    return str(playbook)
+
+
+def role(name, after=None):
+    role = {'role': name, 'ait_role': name + '_install'}
+    if after:
+        role['ait_after'] = after
+    return role
+
+
+def new_scheduler(tmpdir, roles, **kwargs):
+    return StubScheduler(write_playbook(tmpdir, roles), log_dir=str(tmpdir.join('logs')), **kwargs)
+
+
+def test_roles_are_sorted_after_their_dependencies(tmpdir):
+    scheduler = new_scheduler(tmpdir, [role('kibana', ['elasticsearch']), role('filebeat', 'kibana'),
+                                       role('elasticsearch')])
+    assert scheduler.order == ['elasticsearch', 'kibana', 'filebeat']
+
+
+def test_circular_dependency_is_rejected(tmpdir):
+    with pytest.raises(ValueError) as e:
+        new_scheduler(tmpdir, [role('elasticsearch', ['filebeat']), role('kibana', ['elasticsearch']),
+                               role('filebeat', ['kibana'])])
+    assert 'Circular role dependency: elasticsearch -> filebeat -> kibana -> elasticsearch' in str(e.value)
+
+
+def test_unknown_dependency_is_rejected(tmpdir):
+    with pytest.raises(ValueError):
+        new_scheduler(tmpdir, [role('kibana', ['elasticsearch'])])
+
+
+def test_independent_roles_run_concurrently_after_their_dependency(tmpdir):
+    scheduler = new_scheduler(tmpdir, [role('elasticsearch'), role('kibana', ['elasticsearch']),
+                                       role('logstash', ['elasticsearch']), role('filebeat', ['elasticsearch'])],
+                              durations={'elasticsearch': 0.1, 'kibana': 0.3, 'logstash': 0.3, 'filebeat': 0.3})
+    start = time.time()
+    assert scheduler.run()
+    assert time.time() - start < 0.8
+    assert scheduler.started[0] == 'elasticsearch'
+    assert scheduler.max_active == 3
+
+
+def test_critical_path_is_the_longest_chain(tmpdir):
+    scheduler = new_scheduler(tmpdir, [role('elasticsearch'), role('kibana', ['elasticsearch']),
+                                       role('logstash', ['elasticsearch']), role('filebeat', ['logstash'])],
+                              durations={'elasticsearch': 0.1, 'kibana': 0.4, 'logstash': 0.1, 'filebeat': 0.1})
+    assert scheduler.run()
+    seconds, path = scheduler.critical_path()
+    assert path == ['elasticsearch', 'kibana']
+    assert seconds == pytest.approx(0.5, abs=0.1)
+
+
+def test_max_parallel_limits_running_roles(tmpdir):
+    scheduler = new_scheduler(tmpdir, [role('elasticsearch'), role('kibana'), role('logstash'), role('filebeat')],
+                              max_parallel=2)
+    assert scheduler.run()
+    assert scheduler.max_active == 2
+    assert sorted(scheduler.started) == ['elasticsearch', 'filebeat', 'kibana', 'logstash']
+
+
+def test_roles_waiting_for_a_failed_role_are_skipped(tmpdir):
+    scheduler = new_scheduler(tmpdir, [role('elasticsearch'), role('kibana', ['elasticsearch']),
+                                       role('filebeat', ['kibana']), role('metricbeat')],
+                              fail=['elasticsearch'])
+    assert not scheduler.run()
+    assert sorted(scheduler.started) == ['elasticsearch', 'metricbeat']
+    statuses = dict((name, node.status) for name, node in scheduler.nodes.items())
+    assert statuses == {'elasticsearch': 'failed', 'kibana': 'skipped', 'filebeat': 'skipped',
+                        'metricbeat': 'passed'}